@@ -4,3 +4,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attachment_hub.settings')
 
 application = get_asgi_application()
+
+# Compile templates, resolve URLs and fill caches before taking traffic
+from hub.warmup import run_on_boot  # noqa: E402
+
+run_on_boot()
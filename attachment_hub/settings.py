@@ -23,20 +23,24 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'hub.User'
 
 MIDDLEWARE = [
+    'hub.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hub.middleware.PrincipalMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hub.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'attachment_hub.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to Server-Timing
+        'BACKEND': 'hub.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -53,6 +57,14 @@ TEMPLATES = [
 WSGI_APPLICATION = 'attachment_hub.wsgi.application'
 ASGI_APPLICATION = 'attachment_hub.asgi.application'
 
+# Route the public listing/detail pages to hub.async_views. Turn on only when
+# serving through ASGI; under WSGI each async view pays an event-loop hop.
+ASYNC_READ_VIEWS = False
+
+# Compile templates, resolve URLs and prime caches when a worker boots, before
+# it takes traffic (hub/warmup.py). Off under runserver, which reloads often.
+WARMUP_ON_BOOT = not DEBUG
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -60,6 +72,61 @@ DATABASES = {
     }
 }
 
+# Local read replica: a second SQLite file refreshed from the primary with
+# `python manage.py sync_sqlite_replica --interval 5`.
+if os.environ.get('HUB_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Public listing/detail reads go to these aliases (hub/db_router.py); writes
+# and a browser's reads for REPLICA_STICKY_SECONDS after a POST stay on default.
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = 15
+DATABASE_ROUTERS = ['hub.db_router.ReadReplicaRouter']
+
+# Set HUB_REDIS_URL (e.g. redis://127.0.0.1:6379/1; needs the `redis`
+# package) whenever more than one worker runs: cached sessions and users and
+# every cache invalidation below only reach all workers through a shared
+# cache. Without it each worker has its own LocMemCache, so sessions stay in
+# the database and cached entries are only kept briefly.
+REDIS_URL = os.environ.get('HUB_REDIS_URL')
+SHARED_CACHE = bool(REDIS_URL)
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            # RedisCache with timing and hit/miss counts for Server-Timing
+            'BACKEND': 'hub.instrumentation.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            # LocMemCache with timing and hit/miss counts for Server-Timing
+            'BACKEND': 'hub.instrumentation.LocMemCache',
+        }
+    }
+
+# Sessions and the logged-in user are read from the cache; with a warm cache
+# an authenticated request authorizes without a query (hub/principal.py).
+# A logout or a revoked company only clears the local worker's LocMemCache,
+# so without a shared cache sessions are read from the database and cached
+# users / principals expire after a few seconds.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db'
+)
+AUTHENTICATION_BACKENDS = ['hub.principal.CachedModelBackend']
+PRINCIPAL_CACHE_SECONDS = 300 if SHARED_CACHE else 5
+
+# How long a student's cached feed head (latest listings from followed
+# companies) may live; it is also dropped whenever those listings change,
+# but only in the worker that made the change unless the cache is shared
+FEED_HEAD_SECONDS = 600 if SHARED_CACHE else 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -85,14 +152,119 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# collectstatic writes content-hashed names plus .gz (and .br when the optional
+# `brotli` package is installed) siblings; {% static %} resolves hashed names.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'hub.static_assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve STATIC_ROOT from Django (with immutable caching) when there is no
+# front-end server in front of the app.
+SERVE_STATIC = False
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# CV and logo uploads are type-checked and capped while they stream in
+# (hub/uploads.py); per-field limits in bytes.
+FILE_UPLOAD_HANDLERS = [
+    'hub.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_BYTES = {
+    'resume': 10 * 1024 * 1024,
+    'logo': 2 * 1024 * 1024,
+}
+# CVs are sent by permission-checked views. Set to 'nginx' (X-Accel-Redirect to
+# PROTECTED_MEDIA_INTERNAL_URL) or 'sendfile' (X-Sendfile) to let the front-end
+# server do the transfer; None streams from Django.
+PROTECTED_MEDIA_SERVER = None
+PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'
+
+# Resumable chunked CV uploads are assembled here (not under MEDIA_ROOT)
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'chunked_uploads'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'hub:home'
 LOGOUT_REDIRECT_URL = 'hub:home'
 LOGIN_URL = 'login'
 
+# Outbound mail is counted for /metrics, then handed to EMAIL_DELIVERY_BACKEND.
 # For development: print verification emails to the console
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_BACKEND = 'hub.metrics.MetricsEmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Rebuild company profile snapshots on a background thread after each change;
+# False rebuilds inline when the change commits.
+COMPANY_SNAPSHOT_ASYNC = True
+
+# archive_listings moves listings closed for longer than this into the archive tables
+ARCHIVE_AFTER_DAYS = 30
+
+# purge_applications deletes applications that have been in a status for this
+# many days (since their last status change); statuses left out are kept
+APPLICATION_RETENTION_DAYS = {'REJECTED': 365, 'HIRED': 730}
+
+# Absolute base URL used in emails sent outside a request (e.g. search digests)
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Server-Timing header and slow request / slow query log (logs/slow.jsonl).
+# Lower SAMPLE_RATE in production to limit per-query instrumentation.
+REQUEST_TIMING = {
+    'SAMPLE_RATE': 1.0,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+}
+
+LOG_DIR = BASE_DIR / 'logs'
+LOG_DIR.mkdir(exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'jsonl': {'()': 'hub.instrumentation.JsonLineFormatter'},
+    },
+    'handlers': {
+        'slow_log': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LOG_DIR / 'slow.jsonl',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'jsonl',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'hub.slow': {
+            'handlers': ['slow_log'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Prometheus /metrics: per-process snapshots are summed from METRICS_DIR,
+# which should be emptied on deploy. Only these addresses may scrape.
+METRICS_DIR = LOG_DIR / 'metrics'
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Live applicant updates (hub/live.py) are appended here and tailed by every
+# worker's event streams; all workers on the host must share it
+LIVE_EVENTS_DIR = LOG_DIR / 'live'
+
+# Listing view/click counts are buffered per worker and written at most this
+# often, one UPDATE per table (hub/engagement.py)
+ENGAGEMENT_FLUSH_SECONDS = 60
+
+# Upper bound on how long sitemap.xml and the listing feeds are cached; any
+# listing change invalidates them sooner (hub/sitemaps.py), in every worker
+# only when the cache is shared
+SITEMAP_CACHE_SECONDS = 6 * 3600 if SHARED_CACHE else 60
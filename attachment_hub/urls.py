@@ -1,14 +1,18 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
-from django.conf.urls.static import static
+from hub.metrics import metrics_view
+from hub.protected_media import serve_media
+from hub.static_assets import serve_static
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
+    # Prometheus scrape endpoint (local addresses only)
+    path('metrics', metrics_view, name='metrics'),
+
     # point LoginView at your existing template
     path('accounts/login/', auth_views.LoginView.as_view(
         template_name='hub/login.html'
@@ -25,5 +29,16 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    # CVs are only served through the permission-checked download views;
+    # serve_media refuses paths that normalise into the protected prefixes
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_media, {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
+
+if settings.DEBUG or settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static),
+    ]
@@ -4,3 +4,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attachment_hub.settings')
 
 application = get_wsgi_application()
+
+# Compile templates, resolve URLs and fill caches before taking traffic
+from hub.warmup import run_on_boot  # noqa: E402
+
+run_on_boot()
@@ -1,6 +1,19 @@
 # hub/admin.py
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from . import applicant_summaries, feed, funnel
+from .importer import FORMATS, ImportRejected, format_for, import_listings, read_rows
+from .principal import invalidate as invalidate_principals
+from .snapshots import mark_stale
 from .models import (
     JobApplication, ApplicationPersonal, ApplicationEducation, ApplicationCertification,
     ApplicationEmployment, ApplicationReference, ApplicationQuestion,
@@ -14,16 +27,91 @@ from .models import (
     StudentProfile,
     JobPost,
     JobApplication,
+    ArchivedVacancy,
+    ArchivedJobPost,
 )
 
 User = get_user_model()
 
 
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign-key filter picked through the admin autocomplete, instead of a
+    sidebar link per related row. Only the selected row is looked up; the
+    ModelAdmin must include AutocompleteFilterMedia.
+    """
+    template = "admin/hub/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = "%s__%s__exact" % (field_path, field.target_field.name)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.value = self.used_parameters.get(self.lookup_kwarg, [None])[-1]
+        self.formfield = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            to_field_name=field.target_field.name,
+            required=False,
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": "All",
+            "widget": self.formfield.widget.render(
+                self.lookup_kwarg, self.value, attrs={"id": "filter-%s" % self.lookup_kwarg}
+            ),
+        }
+
+
+class AutocompleteFilterMedia:
+    """Loads the select2 assets AutocompleteFilter renders with."""
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Edits one page of the related rows; the page comes from ?<prefix>_page=."""
+    per_page = 25
+    page_number = None
+
+    def get_queryset(self):
+        if not hasattr(self, "_page"):
+            self._page = Paginator(super().get_queryset(), self.per_page).get_page(self.page_number)
+        return self._page.object_list
+
+    @property
+    def page(self):
+        self.get_queryset()
+        return self._page
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = "admin/hub/edit_inline/paginated_tabular.html"
+    per_page = 25
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get("%s_page" % formset.get_default_prefix())
+        return formset
+
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ("username", "email", "role", "is_active", "is_staff", "is_superuser")
     list_filter  = ("role", "is_active", "is_staff", "is_superuser")
     search_fields = ("username", "email")
+    ordering = ("username",)
 
 
 @admin.register(CompanyProfile)
@@ -31,46 +119,120 @@ class CompanyProfileAdmin(admin.ModelAdmin):
     list_display = ("name", "registration_number", "email_verified", "admin_approved", "is_verified_company")
     list_filter  = ("email_verified", "admin_approved", "is_verified_company")
     search_fields = ("name", "registration_number")
+    ordering = ("name",)
     actions = ["approve_selected", "mark_verified_company"]
 
     def approve_selected(self, request, queryset):
+        rows = list(queryset.values_list("pk", "user_id"))
         queryset.update(admin_approved=True)
+        # update() skips CompanyProfile.save(), so drop cached principals here
+        invalidate_principals([user_id for _, user_id in rows])
+        mark_stale([pk for pk, _ in rows])
     approve_selected.short_description = "Mark selected companies as admin approved"
 
     def mark_verified_company(self, request, queryset):
+        ids = list(queryset.values_list("pk", flat=True))
         queryset.update(is_verified_company=True)
+        mark_stale(ids)
     mark_verified_company.short_description = "Mark selected companies as verified companies"
 
 
+class ListingImportForm(forms.Form):
+    company = forms.ModelChoiceField(
+        queryset=CompanyProfile.objects.filter(email_verified=True, admin_approved=True).order_by("name")
+    )
+    file = forms.FileField(help_text="CSV with a header row, or JSONL (one object per line).")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Validate only; insert nothing.")
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if format_for(upload.name) not in FORMATS:
+            raise forms.ValidationError("Upload a .csv or .jsonl file.")
+        return upload
+
+
+class ListingImportMixin:
+    """Adds an "Import" page (CSV / JSONL bulk upload) to a listing changelist."""
+    import_kind = None
+    change_list_template = "admin/hub/listing_change_list.html"
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="%s_%s_import" % info),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        result = None
+        form = ListingImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                result = import_listings(
+                    form.cleaned_data["company"], self.import_kind,
+                    read_rows(upload.file, format_for(upload.name)),
+                    dry_run=form.cleaned_data["dry_run"],
+                )
+            except ImportRejected as exc:
+                form.add_error(None, str(exc))
+            else:
+                verb = "Would import" if result.dry_run else "Imported"
+                level = messages.WARNING if result.errors else messages.SUCCESS
+                self.message_user(
+                    request, f"{verb} {result.created} of {result.rows} rows ({len(result.errors)} rejected).", level
+                )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Import {self.model._meta.verbose_name_plural}",
+            "form": form,
+            "result": result,
+        }
+        return TemplateResponse(request, "admin/hub/import_listings.html", context)
+
+
 @admin.register(Vacancy)
-class VacancyAdmin(admin.ModelAdmin):
+class VacancyAdmin(ListingImportMixin, admin.ModelAdmin):
     # Vacancy does have deadline (your views filter on it) and very likely created_at.
     list_display = ("title", "company", "department", "location", "deadline", "is_active", "is_verified_vacancy")
     list_filter  = ("is_active", "is_verified_vacancy", "company__is_verified_company", "department")
     search_fields = ("title", "company__name", "department", "location")
+    list_select_related = ("company",)
+    show_full_result_count = False
+    autocomplete_fields = ("company",)
     actions = ["verify_selected", "deactivate_selected"]
+    import_kind = "vacancy"
 
     def verify_selected(self, request, queryset):
-        queryset.update(is_verified_vacancy=True)
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        queryset.update(is_verified_vacancy=True, updated_at=timezone.now())
+        mark_stale(company_ids)
     verify_selected.short_description = "Mark selected vacancies as verified"
 
     def deactivate_selected(self, request, queryset):
-        queryset.update(is_active=False)
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        # updated_at dates the deactivation for archive_listings
+        queryset.update(is_active=False, updated_at=timezone.now())
+        mark_stale(company_ids)
+        feed.invalidate_companies(company_ids)
     deactivate_selected.short_description = "Deactivate selected vacancies"
     
     class Meta:
         verbose_name_plural = "Vacancies"
 
 # Inline WITHOUT non-existent timestamps
-class JobApplicationInline(admin.TabularInline):
+class JobApplicationInline(PaginatedTabularInline):
     model = JobApplication
     extra = 0
     fields = ("student", "status", "resume_snapshot")
     # no readonly_fields/date fields here to avoid checks failing
+    raw_id_fields = ("student",)
 
 
 @admin.register(JobPost)
-class JobPostAdmin(admin.ModelAdmin):
+class JobPostAdmin(AutocompleteFilterMedia, ListingImportMixin, admin.ModelAdmin):
     # Use only fields that your views/forms reference consistently
     list_display = (
         "title",
@@ -85,11 +247,38 @@ class JobPostAdmin(admin.ModelAdmin):
         "experience_level",
         "work_location_type",
         "is_active",
-        "company",
+        ("company", AutocompleteFilter),
     )
     search_fields = ("title", "company__name", "department", "location")
+    list_select_related = ("company",)
+    show_full_result_count = False
+    autocomplete_fields = ("company",)
+    actions = ["activate_selected", "deactivate_selected"]
     ordering = ("-id",)  # stable fallback that always exists
     inlines = [JobApplicationInline]
+    import_kind = "job"
+
+    def activate_selected(self, request, queryset):
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        queryset.update(is_active=True, updated_at=timezone.now())
+        mark_stale(company_ids)
+        feed.invalidate_companies(company_ids)
+    activate_selected.short_description = "Activate selected job posts"
+
+    def deactivate_selected(self, request, queryset):
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        # updated_at dates the deactivation for archive_listings
+        queryset.update(is_active=False, updated_at=timezone.now())
+        mark_stale(company_ids)
+        feed.invalidate_companies(company_ids)
+    deactivate_selected.short_description = "Deactivate selected job posts"
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        # New rows are logged by the post_save receiver; only status edits here
+        for inline_form in formset.initial_forms:
+            if inline_form not in formset.deleted_forms and "status" in inline_form.changed_data:
+                funnel.status_changed(inline_form.instance, inline_form.initial["status"])
 
 
 class EducationInline(admin.TabularInline):
@@ -113,23 +302,82 @@ class QuestionInline(admin.TabularInline):
     extra = 0
 
 @admin.register(JobApplication)
-class JobApplicationAdmin(admin.ModelAdmin):
+class JobApplicationAdmin(AutocompleteFilterMedia, admin.ModelAdmin):
     list_display = ("job","student","status","created_at")
-    list_filter = ("status","job__company")
+    list_filter = ("status",("job__company", AutocompleteFilter))
     search_fields = ("student__username","job__title")
+    list_select_related = ("job__company", "student")
+    show_full_result_count = False
+    autocomplete_fields = ("job", "student")
     inlines = [EducationInline, CertificationInline, EmploymentInline, ReferenceInline, QuestionInline]
+    actions = ["mark_under_review", "mark_interview", "mark_rejected", "mark_hired"]
+
+    def _set_status(self, request, queryset, status):
+        with transaction.atomic():
+            changed = funnel.bulk_status_changed(queryset, status)
+        self.message_user(request, f"{changed} application(s) marked {dict(JobApplication.STATUS_CHOICES)[status]}.")
+
+    def mark_under_review(self, request, queryset):
+        self._set_status(request, queryset, "UNDER_REVIEW")
+    mark_under_review.short_description = "Mark selected applications as under review"
+
+    def mark_interview(self, request, queryset):
+        self._set_status(request, queryset, "INTERVIEW")
+    mark_interview.short_description = "Mark selected applications as interviewing"
+
+    def mark_rejected(self, request, queryset):
+        self._set_status(request, queryset, "REJECTED")
+    mark_rejected.short_description = "Mark selected applications as rejected"
+
+    def mark_hired(self, request, queryset):
+        self._set_status(request, queryset, "HIRED")
+    mark_hired.short_description = "Mark selected applications as hired"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "status" in form.changed_data:
+            funnel.status_changed(obj, form.initial["status"])
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        applicant_summaries.refresh(form.instance)
+
+@admin.register(ApplicationPersonal)
+class ApplicationPersonalAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        applicant_summaries.refresh(obj.application)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        applicant_summaries.refresh(obj.application)
 
-admin.site.register(ApplicationPersonal)
 admin.site.register(ApplicationCriminalHistory)
 admin.site.register(ApplicationReferral)
 admin.site.register(ApplicationEEO)
 
 @admin.register(CompanyReview)
-class CompanyReviewAdmin(admin.ModelAdmin):
+class CompanyReviewAdmin(AutocompleteFilterMedia, admin.ModelAdmin):
     # Your model (per views) supports company, rating, approved; user may not exist.
     list_display = ("company", "rating", "approved")
-    list_filter  = ("approved", "rating", "company")
+    list_filter  = ("approved", "rating", ("company", AutocompleteFilter))
     search_fields = ("company__name", "comment")
+    list_select_related = ("company",)
+    show_full_result_count = False
+    autocomplete_fields = ("company",)
+    actions = ["approve_selected", "unapprove_selected"]
+
+    def approve_selected(self, request, queryset):
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        queryset.update(approved=True)
+        mark_stale(company_ids)
+    approve_selected.short_description = "Approve selected reviews"
+
+    def unapprove_selected(self, request, queryset):
+        company_ids = list(queryset.values_list("company_id", flat=True))
+        queryset.update(approved=False)
+        mark_stale(company_ids)
+    unapprove_selected.short_description = "Hide selected reviews"
 
 
 @admin.register(StudentProfile)
@@ -137,4 +385,29 @@ class StudentProfileAdmin(admin.ModelAdmin):
     # Keep this minimal; your views reference resume/default_cover_letter, often phone exists.
     list_display = ("user",)
     search_fields = ("user__username", "user__email")
+    list_select_related = ("user",)
+    show_full_result_count = False
+
+
+class ArchivedListingAdmin(admin.ModelAdmin):
+    # Archive rows are a read-only record; they are written by archive_listings
+    list_select_related = ("company",)
+    search_fields = ("title", "company__name")
+    date_hierarchy = "archived_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedVacancy)
+class ArchivedVacancyAdmin(ArchivedListingAdmin):
+    list_display = ("title", "company", "deadline", "created_at", "archived_at")
+
 
+@admin.register(ArchivedJobPost)
+class ArchivedJobPostAdmin(ArchivedListingAdmin):
+    list_display = ("title", "company", "job_type", "application_count", "created_at", "archived_at")
+    exclude = ("applications",)
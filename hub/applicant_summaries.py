@@ -0,0 +1,116 @@
+"""
+Per-application summaries of the Standard Apply form (ApplicantSummary).
+
+company_job_applicants sorts and filters on the highest education level,
+whether the applicant graduated, total months of employment, the earliest
+start date and eligibility to work. Reading those from the education,
+employment and personal sections would mean prefetching all three for every
+applicant on every load, so refresh() stores them in one indexed row per
+application whenever the sections are saved (job_apply_standard and the
+JobApplication / ApplicationPersonal admin pages). rebuild() fills in the
+rows for applications that predate the table.
+
+The education level is read from the free-text degree with LEVEL_PATTERNS;
+anything they do not recognise counts as 'Other'.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ApplicantSummary, ApplicationPersonal, JobApplication
+
+LEVEL_PATTERNS = (
+    (5, re.compile(r"\bph\.?\s?d\b|doctor", re.IGNORECASE)),
+    (4, re.compile(r"master|\bm\.?\s?sc\b|\bm\.?\s?a\b|\bmba\b|\bm\.?\s?phil\b|\bm\.?\s?ed\b", re.IGNORECASE)),
+    (3, re.compile(r"bachelor|degree|undergraduate|\bb\.?\s?(sc|a|com|ed|eng|tech|arch)\b|\bll\.?\s?b\b", re.IGNORECASE)),
+    (2, re.compile(r"diploma|higher national|\bhnd\b", re.IGNORECASE)),
+    (1, re.compile(r"certificate|\bcert\b|craft", re.IGNORECASE)),
+)
+DAYS_PER_MONTH = 365.25 / 12
+CHUNK = 500
+
+
+def education_level(degree):
+    """The EDUCATION_LEVELS value of a free-text degree or diploma name."""
+    for level, pattern in LEVEL_PATTERNS:
+        if pattern.search(degree):
+            return level
+    return 0
+
+
+def experience_months(periods, until):
+    """Whole months covered by ``[(start, end), ...]``; overlaps count once, a missing end is ``until``."""
+    spans = sorted(
+        (start, min(end or until, until)) for start, end in periods
+        if start is not None and start < min(end or until, until)
+    )
+    days = 0
+    covered_to = None
+    for start, end in spans:
+        if covered_to is not None and start < covered_to:
+            start = covered_to
+        if end > start:
+            days += (end - start).days
+            covered_to = end
+    return int(days / DAYS_PER_MONTH)
+
+
+def _values(application, personal, educations, employments):
+    levels = [(education_level(e.degree_or_diploma), e.graduated) for e in educations]
+    until = timezone.localdate(application.created_at)
+    return {
+        'job_id': application.job_id,
+        'education_level': max(level for level, _ in levels) if levels else None,
+        'graduated': any(graduated for _, graduated in levels),
+        'experience_months': experience_months([(e.start_date, e.end_date) for e in employments], until),
+        'start_date': personal.start_date if personal else None,
+        'eligible_to_work': personal.eligible_to_work if personal else None,
+    }
+
+
+def refresh(application):
+    """Recompute and store the summary of ``application`` from its saved sections (if it has any)."""
+    # Not application.personal: a lookup before the section existed cached None
+    personal = ApplicationPersonal.objects.filter(application_id=application.pk).first()
+    educations = list(application.educations.all())
+    employments = list(application.employments.all())
+    if personal is None and not educations and not employments:
+        # Nothing from Standard Apply (e.g. an Easy Apply edited in the admin)
+        ApplicantSummary.objects.filter(application_id=application.pk).delete()
+        return
+    ApplicantSummary.objects.update_or_create(
+        application_id=application.pk,
+        defaults=_values(application, personal, educations, employments),
+    )
+
+
+def rebuild(job_ids=None):
+    """Summarise every application with Standard Apply sections; returns how many."""
+    applications = JobApplication.objects.filter(
+        Q(personal__isnull=False) | Q(educations__isnull=False) | Q(employments__isnull=False)
+    ).distinct()
+    if job_ids is not None:
+        applications = applications.filter(job_id__in=job_ids)
+    ids = list(applications.order_by('pk').values_list('pk', flat=True))
+
+    for start in range(0, len(ids), CHUNK):
+        batch = (
+            JobApplication.objects.filter(pk__in=ids[start:start + CHUNK])
+            .select_related('personal').prefetch_related('educations', 'employments')
+        )
+        summaries = [
+            ApplicantSummary(
+                application_id=application.pk,
+                **_values(
+                    application, getattr(application, 'personal', None),
+                    application.educations.all(), application.employments.all(),
+                ),
+            )
+            for application in batch
+        ]
+        with transaction.atomic():
+            ApplicantSummary.objects.filter(application_id__in=ids[start:start + CHUNK]).delete()
+            ApplicantSummary.objects.bulk_create(summaries)
+    return len(ids)
@@ -3,3 +3,36 @@ from django.apps import AppConfig
 class HubConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hub'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+        from .instrumentation import install_db_wrapper
+        from . import feed, fuzzy, live
+        from .funnel import on_application_saved
+        from .models import CompanyProfile, CompanyReview, JobApplication, JobPost, Vacancy
+        from .snapshots import on_change
+
+        # Time every query for Server-Timing, including sync_to_async threads
+        connection_created.connect(install_db_wrapper)
+
+        # Rebuild the materialized company page when anything on it changes
+        for model in (CompanyProfile, Vacancy, JobPost, CompanyReview):
+            post_save.connect(on_change, sender=model, dispatch_uid=f'snapshot-{model.__name__}-save')
+            post_delete.connect(on_change, sender=model, dispatch_uid=f'snapshot-{model.__name__}-delete')
+
+        # Log new applications and count them in the hiring-funnel rollups
+        post_save.connect(on_application_saved, sender=JobApplication, dispatch_uid='funnel-application-save')
+
+        # Push new applications to open company_job_applicants pages
+        post_save.connect(live.on_application_saved, sender=JobApplication, dispatch_uid='live-application-save')
+
+        # Keep the trigram index for typo-tolerant job search current
+        for model in (JobPost, CompanyProfile):
+            post_save.connect(fuzzy.on_save, sender=model, dispatch_uid=f'trigrams-{model.__name__}-save')
+            post_delete.connect(fuzzy.on_delete, sender=model, dispatch_uid=f'trigrams-{model.__name__}-delete')
+
+        # Drop the cached feed heads of the company's followers
+        for model in (Vacancy, JobPost):
+            post_save.connect(feed.on_listing_change, sender=model, dispatch_uid=f'feed-{model.__name__}-save')
+            post_delete.connect(feed.on_listing_change, sender=model, dispatch_uid=f'feed-{model.__name__}-delete')
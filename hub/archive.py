@@ -0,0 +1,134 @@
+"""
+Hot/cold split for listings.
+
+Vacancies whose deadline passed, and vacancies and job posts that were
+deactivated, more than ARCHIVE_AFTER_DAYS ago are copied into ArchivedVacancy
+/ ArchivedJobPost and deleted from the hot tables in batches, each batch in
+its own transaction. Active job posts are never archived: job_list shows them
+until they are closed. A listing's age since deactivation is taken from
+``updated_at`` (the deactivation is its last save).
+
+A job post's applications (and every model hanging off JobApplication) go
+with it as serialized snapshots, and each student keeps an
+ArchivedApplication row for their dashboard, so the hot tables only grow
+with the live set. The listings' duplicate-detection fingerprints are
+deleted with them.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    ArchivedApplication, ArchivedJobPost, ArchivedVacancy, JobApplication, JobPost, ListingFingerprint, Vacancy,
+)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+DEFAULT_BATCH_SIZE = 500
+
+
+def archive_after_days():
+    return getattr(settings, 'ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+def _copied_fields(model, archive_model):
+    """Columns of ``model`` that its archive table also has."""
+    archived = {f.attname for f in archive_model._meta.concrete_fields}
+    return [f.attname for f in model._meta.concrete_fields if not f.primary_key and f.attname in archived]
+
+
+def archivable_vacancies(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Vacancy.objects.filter(
+        Q(deadline__lt=cutoff.date()) | Q(is_active=False, updated_at__lt=cutoff)
+    )
+
+
+def archivable_job_posts(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return JobPost.objects.filter(is_active=False, updated_at__lt=cutoff)
+
+
+def _application_snapshots(job_ids):
+    """``{job_id: [[serialized application, *serialized sections], ...]}``"""
+    applications = list(JobApplication.objects.filter(job_id__in=job_ids))
+    children = defaultdict(list)
+    for rel in JobApplication._meta.related_objects:
+        if rel.many_to_many:
+            continue
+        related = rel.related_model.objects.filter(**{f"{rel.field.name}__in": applications})
+        for child in related:
+            children[getattr(child, rel.field.attname)].append(child)
+
+    snapshots = defaultdict(list)
+    for application in applications:
+        snapshots[application.job_id].append(
+            serializers.serialize('python', [application, *children[application.pk]])
+        )
+    return snapshots
+
+
+def _archive_vacancy_batch(ids):
+    fields = _copied_fields(Vacancy, ArchivedVacancy)
+    rows = Vacancy.objects.filter(pk__in=ids).values('pk', *fields)
+    ArchivedVacancy.objects.bulk_create(
+        [ArchivedVacancy(original_id=row.pop('pk'), **row) for row in rows]
+    )
+    ListingFingerprint.objects.filter(kind='VACANCY', object_id__in=ids).delete()
+    Vacancy.objects.filter(pk__in=ids).delete()
+
+
+def _archive_job_batch(ids):
+    fields = _copied_fields(JobPost, ArchivedJobPost)
+    rows = list(JobPost.objects.filter(pk__in=ids).values('pk', *fields))
+    snapshots = _application_snapshots(ids)
+    ArchivedJobPost.objects.bulk_create(
+        [
+            ArchivedJobPost(
+                original_id=row['pk'],
+                applications=snapshots[row['pk']],
+                application_count=len(snapshots[row['pk']]),
+                **{k: v for k, v in row.items() if k != 'pk'},
+            )
+            for row in rows
+        ]
+    )
+    archived_ids = dict(ArchivedJobPost.objects.filter(original_id__in=ids).values_list('original_id', 'pk'))
+    ArchivedApplication.objects.bulk_create(
+        [
+            ArchivedApplication(
+                job_id=archived_ids[job_id], student_id=student_id, status=status,
+                created_at=created_at, resume_snapshot=resume or '',
+            )
+            for job_id, student_id, status, created_at, resume in JobApplication.objects.filter(job_id__in=ids)
+            .values_list('job_id', 'student_id', 'status', 'created_at', 'resume_snapshot')
+        ],
+        batch_size=1000,
+    )
+    ListingFingerprint.objects.filter(kind='JOB', object_id__in=ids).delete()
+    # Cascades to the applications and their sections
+    JobPost.objects.filter(pk__in=ids).delete()
+
+
+def _run(queryset, archive_batch, batch_size):
+    moved = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        with transaction.atomic():
+            archive_batch(ids)
+        moved += len(ids)
+
+
+def archive_listings(days=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Move every archivable listing; returns ``(vacancies, job_posts)`` moved."""
+    days = archive_after_days() if days is None else days
+    return (
+        _run(archivable_vacancies(days), _archive_vacancy_batch, batch_size),
+        _run(archivable_job_posts(days), _archive_job_batch, batch_size),
+    )
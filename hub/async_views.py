@@ -0,0 +1,157 @@
+"""
+Async versions of the public read views, for deployment behind ASGI.
+
+Queries go through the async ORM (aget/acount/aiterator) and the rating
+cache through cache.aget/aset, so the event loop is free while the
+database works. Template rendering stays synchronous (the auth and
+messages context processors touch the session lazily), so it is handed to
+sync_to_async once every row the template needs has been fetched.
+
+hub/urls.py routes to these instead of hub.views when ASYNC_READ_VIEWS is on.
+company_job_applicant_events, the live applicant stream, is always routed
+here but only streams under that setting.
+"""
+from collections.abc import Sequence
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Avg
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render
+
+from . import engagement, live
+from .feed import is_following
+from .forms import CompanyReviewForm
+from .models import JobPost, Vacancy
+from .snapshots import profile_context
+from .views import job_search, vacancy_search
+
+PAGE_SIZE = 12
+RATING_CACHE_TIMEOUT = 300
+
+arender = sync_to_async(render)
+
+
+class _FetchedRows(Sequence):
+    """
+    One page of rows fetched asynchronously, presented to Paginator as the
+    full result set (its length is the total count) so Page keeps working.
+    """
+
+    def __init__(self, rows, offset, total):
+        self.rows = rows
+        self.offset = offset
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start = (index.start or 0) - self.offset
+            stop = (index.stop if index.stop is not None else self.total) - self.offset
+            return self.rows[max(start, 0):max(stop, 0)]
+        return self.rows[index - self.offset]
+
+
+async def _apaginate(queryset, page_number, per_page=PAGE_SIZE):
+    total = await queryset.acount()
+    # Same clamping as Paginator.get_page(), without touching the DB twice
+    number = Paginator(range(total), per_page).get_page(page_number).number
+    offset = (number - 1) * per_page
+    rows = [obj async for obj in queryset[offset:offset + per_page].aiterator()]
+    return Paginator(_FetchedRows(rows, offset, total), per_page).page(number)
+
+
+async def _aaverage_rating(company):
+    key = f"company:{company.pk}:avg_rating"
+    avg = await cache.aget(key)
+    if avg is None:
+        result = await company.reviews.filter(approved=True).aaggregate(Avg('rating'))
+        avg = round(result['rating__avg'], 1) if result['rating__avg'] is not None else ''
+        await cache.aset(key, avg, RATING_CACHE_TIMEOUT)
+    return avg or None
+
+
+async def vacancy_list(request):
+    vacancies, context = vacancy_search(request)
+    page_obj = await _apaginate(vacancies, request.GET.get('page'))
+    context['vacancies'] = page_obj
+    context['page_obj'] = page_obj
+    return await arender(request, 'hub/vacancy_list.html', context)
+
+
+async def home(request):
+    return await vacancy_list(request)
+
+
+async def job_list(request):
+    if request.GET.get('mode', 'jobs') == 'attachments':
+        return await vacancy_list(request)
+
+    jobs, context = await sync_to_async(job_search)(request, fuzzy_fallback=True)
+    context['jobs'] = [job async for job in jobs.aiterator()]
+    return await arender(request, 'hub/job_list.html', context)
+
+
+async def vacancy_detail(request, pk):
+    vacancy = await aget_object_or_404(
+        Vacancy.objects.select_related('company'), pk=pk, is_active=True
+    )
+    company = vacancy.company
+    await engagement.arecord_view(request, vacancy)
+    reviews = [r async for r in company.reviews.filter(approved=True)[:6]]
+    return await arender(request, 'hub/vacancy_detail.html', {
+        'vacancy': vacancy,
+        'company': company,
+        'reviews': reviews,
+        'avg_rating': await _aaverage_rating(company),
+        'review_form': CompanyReviewForm(),
+    })
+
+
+async def job_detail(request, pk):
+    job = await aget_object_or_404(
+        JobPost.objects.select_related('company'), pk=pk, is_active=True
+    )
+    await engagement.arecord_view(request, job)
+    return await arender(request, 'hub/job_detail.html', {
+        'job': job,
+        'company': job.company,
+        'avg_rating': await _aaverage_rating(job.company),
+    })
+
+
+async def company_profile(request, company_id):
+    context = await sync_to_async(profile_context)(company_id, request.GET.get('tab', 'attachments'))
+    context['following'] = await sync_to_async(is_following)(getattr(request, 'user', None), company_id)
+    return await arender(request, 'hub/company_profile.html', context)
+
+
+def _posting_company_id(request):
+    principal = request.principal
+    return principal.company_id if principal.is_company and principal.can_post else None
+
+
+async def company_job_applicant_events(request, pk):
+    """
+    Server-Sent Events for an open company_job_applicants page: new
+    applications and status changes for the job, from hub/live.py. One
+    stream holds no thread or database connection while it waits.
+    """
+    company_id = await sync_to_async(_posting_company_id)(request)
+    if company_id is None:
+        return HttpResponseForbidden()
+    if not await JobPost.objects.filter(pk=pk, company_id=company_id).aexists():
+        raise Http404("No JobPost matches the given query.")
+    if not getattr(settings, 'ASYNC_READ_VIEWS', False):
+        # Under WSGI a stream would pin a worker; 204 tells EventSource to stop
+        return HttpResponse(status=204)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    response = StreamingHttpResponse(live.stream(pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'   # nginx: pass events through unbuffered
+    return response
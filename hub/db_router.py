@@ -0,0 +1,121 @@
+"""
+Read-replica routing for the public listing and detail pages.
+
+ReplicaRoutingMiddleware marks a request as replica-safe when it is a GET/HEAD
+to one of REPLICA_READ_VIEWS and the browser has not written recently. The
+router then sends that request's reads to a random alias in READ_REPLICAS;
+everything else, all writes, and anything inside a transaction stays on
+``default``.
+
+After any unsafe request (POST etc.) the response sets a short-lived
+``db_pin`` cookie, so the same browser reads its own writes from the primary
+for REPLICA_STICKY_SECONDS.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+# Views whose reads may be served by a replica
+REPLICA_READ_VIEWS = {
+    'hub:home',
+    'hub:vacancy_list',
+    'hub:vacancy_detail',
+    'hub:job_list',
+    'hub:job_detail',
+    'hub:company_profile',
+}
+
+# Identity data always comes from the primary
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes', 'admin'}
+
+PIN_COOKIE = 'db_pin'
+
+_use_replica = contextvars.ContextVar('hub_use_replica', default=False)
+
+
+def replicas():
+    return [alias for alias in getattr(settings, 'READ_REPLICAS', []) if alias in settings.DATABASES]
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get():
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_ONLY_APPS or model is _user_model():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        aliases = replicas()
+        return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary (see sync_sqlite_replica)
+        return db == DEFAULT_DB_ALIAS
+
+
+def _user_model():
+    from django.contrib.auth import get_user_model
+    return get_user_model()
+
+
+@sync_and_async_middleware
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Set the flag in the request's own context: a sync process_view
+            # would run in a sync_to_async copy and its token could not be reset
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                _use_replica.reset(request._replica_token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        request._replica_token = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                _use_replica.reset(request._replica_token)
+        return self._pin(request, response)
+
+    def _pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 15),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in REPLICA_READ_VIEWS
+            and PIN_COOKIE not in request.COOKIES
+            and replicas()
+        ):
+            request._replica_token = _use_replica.set(True)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        ReplicaRoutingMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
@@ -0,0 +1,196 @@
+"""
+Near-duplicate detection for vacancies and job posts.
+
+Each listing is reduced to a MinHash signature over word shingles of its
+descriptive text. Signatures are split into LSH bands; every band is hashed
+(together with the company id) into a bucket key stored in ListingBand, so
+finding candidate clones is a single indexed ``key IN (...)`` lookup instead
+of a scan over the company's history.
+"""
+import hashlib
+import re
+import struct
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ListingBand, ListingFingerprint, Vacancy
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity at or above which two listings are clones.
+DEFAULT_THRESHOLD = 0.7
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _permutations():
+    # Deterministic (a, b) pairs so signatures are stable across processes.
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-perm-{i}".encode(), digest_size=16).digest()
+        a, b = struct.unpack("<QQ", digest)
+        perms.append((a % (_MERSENNE - 1) + 1, b % _MERSENNE))
+    return perms
+
+
+_PERMS = _permutations()
+
+
+def threshold():
+    return getattr(settings, "LISTING_DUPLICATE_THRESHOLD", DEFAULT_THRESHOLD)
+
+
+def listing_text(listing):
+    """Concatenate the fields that define what a listing is about."""
+    if isinstance(listing, Vacancy):
+        parts = (listing.title, listing.requirements, listing.required_skills)
+    else:
+        parts = (listing.title, listing.department, listing.responsibilities)
+    return "\n".join(p or "" for p in parts)
+
+
+def shingles(text):
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash_shingle(shingle):
+    return struct.unpack("<I", hashlib.blake2b(shingle.encode(), digest_size=4).digest())[0]
+
+
+def minhash(text):
+    """Return the MinHash signature of ``text`` as a tuple of NUM_PERM ints."""
+    hashes = [_hash_shingle(s) for s in shingles(text)]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    )
+
+
+def pack_signature(signature):
+    return struct.pack(f"<{NUM_PERM}I", *signature)
+
+
+def unpack_signature(blob):
+    return struct.unpack(f"<{NUM_PERM}I", bytes(blob))
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def band_keys(company_id, signature):
+    """One bucket key per band, scoped to the company."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        raw = struct.pack(f"<QH{ROWS}I", company_id, band, *rows)
+        keys.append(hashlib.blake2b(raw, digest_size=8).hexdigest())
+    return keys
+
+
+def find_near_duplicates(company, text, exclude=None):
+    """
+    Return ``[(fingerprint, similarity), ...]`` for the company's listings whose
+    text is a near-duplicate of ``text``, most similar first.
+    ``exclude`` is an optional ``(kind, object_id)`` to leave out (the listing itself).
+    """
+    signature = minhash(text)
+    keys = band_keys(company.pk, signature)
+    candidate_ids = set(
+        ListingBand.objects.filter(key__in=keys).values_list("fingerprint_id", flat=True)
+    )
+    if not candidate_ids:
+        return []
+
+    candidates = ListingFingerprint.objects.filter(id__in=candidate_ids, company=company)
+    if exclude:
+        candidates = candidates.exclude(kind=exclude[0], object_id=exclude[1])
+
+    cutoff = threshold()
+    matches = []
+    for fp in candidates:
+        score = similarity(signature, unpack_signature(fp.signature))
+        if score >= cutoff:
+            matches.append((fp, score))
+    matches.sort(key=lambda m: m[1], reverse=True)
+    return matches
+
+
+def active_duplicate(matches):
+    """First match that is still live on the site, if any."""
+    for fp, score in matches:
+        if fp.listing_is_live():
+            return fp, score
+    return None
+
+
+def index_listing(listing, matches=None):
+    """
+    Store (or refresh) the fingerprint and LSH bands for ``listing``.
+    When ``matches`` from find_near_duplicates() are given, the best one is
+    recorded as ``duplicate_of`` so moderators can review the cluster.
+    """
+    kind = ListingFingerprint.kind_for(listing)
+    signature = minhash(listing_text(listing))
+    duplicate_of, score = (matches[0] if matches else (None, None))
+
+    with transaction.atomic():
+        fp, _ = ListingFingerprint.objects.update_or_create(
+            kind=kind,
+            object_id=listing.pk,
+            defaults={
+                "company_id": listing.company_id,
+                "title": listing.title[:255],
+                "signature": pack_signature(signature),
+                "duplicate_of": duplicate_of,
+                "similarity": score,
+            },
+        )
+        fp.bands.all().delete()
+        ListingBand.objects.bulk_create(
+            ListingBand(fingerprint=fp, key=key)
+            for key in band_keys(listing.company_id, signature)
+        )
+    return fp
+
+
+def index_new_listings(pairs):
+    """
+    Bulk index_listing() for freshly inserted listings that have no
+    fingerprint yet. ``pairs`` is ``[(listing, matches), ...]``.
+    """
+    fingerprints, signatures = [], []
+    for listing, matches in pairs:
+        signature = minhash(listing_text(listing))
+        duplicate_of, score = (matches[0] if matches else (None, None))
+        fingerprints.append(ListingFingerprint(
+            kind=ListingFingerprint.kind_for(listing),
+            object_id=listing.pk,
+            company_id=listing.company_id,
+            title=listing.title[:255],
+            signature=pack_signature(signature),
+            duplicate_of=duplicate_of,
+            similarity=score,
+        ))
+        signatures.append(signature)
+    ListingFingerprint.objects.bulk_create(fingerprints)
+    ListingBand.objects.bulk_create(
+        ListingBand(fingerprint=fp, key=key)
+        for fp, signature in zip(fingerprints, signatures)
+        for key in band_keys(fp.company_id, signature)
+    )
@@ -0,0 +1,169 @@
+"""
+View and outbound-click counts for vacancies and job posts.
+
+vacancy_detail / job_detail call record_view(), and the application_link
+redirect (views.vacancy_apply_link) calls record_click(). Neither writes to
+the database: hits from bots, from the listing's own company and repeats by
+the same visitor within DEDUP_SECONDS (a cache.add per hit) are dropped, the
+rest are added to a per-process buffer under a lock. At most every
+FLUSH_SECONDS (ENGAGEMENT_FLUSH_SECONDS) the request that notices the
+interval has passed writes the buffer with one UPDATE per table::
+
+    UPDATE hub_vacancy SET view_count = view_count + CASE id WHEN .. THEN .. END, ...
+    WHERE id IN (...)
+
+Increments are relative, so every worker flushes its own buffer
+independently; whatever is still buffered is flushed at interpreter exit.
+The company dashboard reads the columns, so counts lag by up to one interval.
+
+Repeats are only recognised across workers when the cache is shared
+(HUB_REDIS_URL); with the per-process LocMemCache each worker keeps its own
+dedup keys, so a visitor whose hits land on several workers is counted once
+per worker.
+"""
+import atexit
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .models import JobPost, Vacancy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_SECONDS = 60
+DEDUP_SECONDS = 30 * 60
+CHUNK = 500
+
+MODELS = {
+    'VACANCY': Vacancy,
+    'JOB': JobPost,
+}
+
+# Crawlers, link unfurlers, monitors and scripted clients
+_BOT_RE = re.compile(
+    r"bot|crawl|spider|slurp|scrap|preview|facebookexternalhit|whatsapp|telegram|"
+    r"headless|lighthouse|pingdom|uptime|monitor|curl|wget|python-|httpclient|okhttp|java/|go-http",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+_buffer = defaultdict(Counter)   # (kind, pk) -> Counter({'view_count': n, 'click_count': n})
+_last_flush = time.monotonic()
+
+
+def _flush_seconds():
+    return getattr(settings, 'ENGAGEMENT_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)
+
+
+def is_bot(request):
+    if request.method != 'GET':
+        return True
+    agent = request.headers.get('User-Agent', '')
+    return not agent or bool(_BOT_RE.search(agent)) or request.headers.get('Purpose') == 'prefetch'
+
+
+def _visitor(request):
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f"s:{session}" if session else f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _owned_by_viewer(request, company_id):
+    # Only signed-in users can be the company; anonymous hits skip the principal
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    return request.principal.company_id == company_id
+
+
+def _dedup_key(request, kind, pk, field):
+    return f"engagement:{field}:{kind}:{pk}:{_visitor(request)}"
+
+
+def _add(kind, pk, field):
+    """Buffer one hit; True when this caller should flush."""
+    global _last_flush
+    with _lock:
+        _buffer[kind, pk][field] += 1
+        due = time.monotonic() - _last_flush >= _flush_seconds()
+        if due:
+            _last_flush = time.monotonic()
+    return due
+
+
+def _record(request, kind, pk, company_id, field):
+    if is_bot(request) or _owned_by_viewer(request, company_id):
+        return
+    if cache.add(_dedup_key(request, kind, pk, field), 1, DEDUP_SECONDS) and _add(kind, pk, field):
+        flush()
+
+
+def record_view(request, listing):
+    kind = 'VACANCY' if isinstance(listing, Vacancy) else 'JOB'
+    _record(request, kind, listing.pk, listing.company_id, 'view_count')
+
+
+def record_click(request, vacancy_id, company_id):
+    _record(request, 'VACANCY', vacancy_id, company_id, 'click_count')
+
+
+async def arecord_view(request, listing):
+    """record_view() for the async views; anonymous visitors cost no thread hop until a flush is due."""
+    kind = 'VACANCY' if isinstance(listing, Vacancy) else 'JOB'
+    if is_bot(request):
+        return
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        if await sync_to_async(_owned_by_viewer)(request, listing.company_id):
+            return
+    key = _dedup_key(request, kind, listing.pk, 'view_count')
+    if await cache.aadd(key, 1, DEDUP_SECONDS) and _add(kind, listing.pk, 'view_count'):
+        await sync_to_async(flush)()
+
+
+def _update(model, counts):
+    """One UPDATE adding ``counts`` ({pk: Counter}) to the rows of ``model``."""
+    fields = {field for counter in counts.values() for field in counter}
+    changes = {
+        field: F(field) + Case(
+            *[When(pk=pk, then=Value(counter[field])) for pk, counter in counts.items() if counter[field]],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+        for field in fields
+    }
+    model.objects.filter(pk__in=list(counts)).update(**changes)
+
+
+def flush():
+    """Write and reset this process's buffer; returns the number of listings updated."""
+    with _lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+    per_kind = defaultdict(dict)
+    for (kind, pk), counter in pending.items():
+        per_kind[kind][pk] = counter
+    written = 0
+    for kind, counts in per_kind.items():
+        ids = list(counts)
+        for start in range(0, len(ids), CHUNK):
+            chunk = {pk: counts[pk] for pk in ids[start:start + CHUNK]}
+            try:
+                _update(MODELS[kind], chunk)
+            except DatabaseError:
+                # e.g. the database is locked: keep the counts for the next flush
+                logger.exception("Could not flush %s engagement counts", kind)
+                with _lock:
+                    for pk, counter in chunk.items():
+                        _buffer[kind, pk].update(counter)
+                continue
+            written += len(chunk)
+    return written
+
+
+atexit.register(flush)
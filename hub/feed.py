@@ -0,0 +1,207 @@
+"""
+Timeline of new listings from the companies a student follows.
+
+Students follow companies (CompanyFollow); nothing is fanned out when a
+company posts. The feed is read as the live vacancies and job posts of the
+followed companies, merged newest first by (created_at, id), one
+``company_id IN (...)`` query per table on the (company, created_at) index,
+each limited to the page size. Pages continue "before" the last entry shown
+(keyset pagination) rather than by OFFSET.
+
+The first HEAD_SIZE entries, with everything the dashboard shows for them,
+are cached per student together with the followed company ids, so the
+dashboard and the first pages cost one cache read. The head is dropped when
+the student follows or unfollows a company, and when a followed company's
+listing is saved or deleted (signals connected in HubConfig.ready; the bulk
+update() paths call invalidate_companies()). It expires after
+FEED_HEAD_SECONDS regardless. The deletes only reach other workers through a
+shared cache, so without HUB_REDIS_URL that setting is kept short.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CompanyFollow, JobPost, Vacancy
+
+PAGE_SIZE = 10
+HEAD_SIZE = 50
+DEFAULT_HEAD_SECONDS = 600
+
+MODELS = {
+    'VACANCY': Vacancy,
+    'JOB': JobPost,
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _timeout():
+    return getattr(settings, 'FEED_HEAD_SECONDS', DEFAULT_HEAD_SECONDS)
+
+
+def _head_key(student_id):
+    return f"feed:head:{student_id}"
+
+
+@dataclass(frozen=True)
+class Entry:
+    kind: str          # 'VACANCY' | 'JOB'
+    id: int
+    created_at: datetime
+    title: str
+    company_id: int
+    company_name: str
+    location: str
+    deadline: date = None
+
+    @property
+    def key(self):
+        """Feed order, newest first: (created_at, id), then kind between a vacancy and a job with the same id."""
+        return (self.created_at, self.id, self.kind)
+
+    @property
+    def cursor(self):
+        return f"{(self.created_at - _EPOCH) // _MICROSECOND}-{self.kind}-{self.id}"
+
+    def get_absolute_url(self):
+        name = 'hub:vacancy_detail' if self.kind == 'VACANCY' else 'hub:job_detail'
+        return reverse(name, args=[self.id])
+
+    def get_kind_display(self):
+        return 'Attachment' if self.kind == 'VACANCY' else 'Job'
+
+    def is_live(self, today):
+        return self.deadline is None or self.deadline >= today
+
+
+def parse_cursor(value):
+    """The feed key encoded by ``Entry.cursor``, or None if ``value`` is missing or malformed."""
+    try:
+        micros, kind, pk = (value or '').split('-')
+        if kind not in MODELS:
+            return None
+        return (_EPOCH + int(micros) * _MICROSECOND, int(pk), kind)
+    except ValueError:
+        return None
+
+
+def _older_than(kind, cursor):
+    created_at, pk, cursor_kind = cursor
+    older = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+    if kind < cursor_kind:
+        older |= Q(created_at=created_at, pk=pk)
+    return older
+
+
+def fetch(company_ids, before=None, limit=PAGE_SIZE):
+    """
+    Up to ``limit`` live entries from ``company_ids`` (every company when
+    None), newest first, older than the key ``before``.
+    """
+    if company_ids is not None and not company_ids:
+        return []
+    today = timezone.localdate()
+    streams = []
+    for kind, model in MODELS.items():
+        rows = model.objects.filter(is_active=True)
+        if company_ids is not None:
+            rows = rows.filter(company_id__in=company_ids)
+        fields = ['pk', 'created_at', 'title', 'company_id', 'company__name', 'location']
+        if model is Vacancy:
+            rows = rows.filter(deadline__gte=today)
+            fields.append('deadline')
+        if before is not None:
+            rows = rows.filter(_older_than(kind, before))
+        rows = rows.order_by('-created_at', '-pk').values_list(*fields)[:limit]
+        streams.append([Entry(kind, *row) for row in rows])
+    merged = heapq.merge(*streams, key=lambda entry: entry.key, reverse=True)
+    return [entry for _, entry in zip(range(limit), merged)]
+
+
+def head(student_id):
+    """
+    The cached start of the student's timeline: ``{'companies': [...],
+    'entries': [...], 'complete': bool}``, where ``complete`` means the
+    entries are the whole feed.
+    """
+    key = _head_key(student_id)
+    cached = cache.get(key)
+    if cached is None:
+        companies = list(CompanyFollow.objects.filter(student_id=student_id).values_list('company_id', flat=True))
+        entries = fetch(companies, limit=HEAD_SIZE + 1)
+        cached = {
+            'companies': companies,
+            'entries': entries[:HEAD_SIZE],
+            'complete': len(entries) <= HEAD_SIZE,
+        }
+        cache.set(key, cached, _timeout())
+    return cached
+
+
+def page(student_id, before=None, size=PAGE_SIZE):
+    """
+    ``(entries, cursor of the next page or None)``: up to ``size`` entries
+    older than the cursor string ``before`` (from the start when empty).
+    Served from the cached head while it reaches far enough.
+    """
+    timeline = head(student_id)
+    cursor = parse_cursor(before)
+    today = timezone.localdate()
+    entries = [
+        entry for entry in timeline['entries']
+        if entry.is_live(today) and (cursor is None or entry.key < cursor)
+    ]
+    if len(entries) <= size and not timeline['complete']:
+        entries = fetch(timeline['companies'], cursor, size + 1)
+    shown = entries[:size]
+    return shown, (shown[-1].cursor if len(entries) > size else None)
+
+
+def is_following(user, company_id):
+    """``user`` may be None (a request without auth, e.g. from bench_read_views)."""
+    if not (user is not None and user.is_authenticated and user.role == 'STUDENT'):
+        return False
+    cached = cache.get(_head_key(user.pk))
+    if cached is not None:
+        return company_id in cached['companies']
+    return CompanyFollow.objects.filter(student_id=user.pk, company_id=company_id).exists()
+
+
+def follow(student_id, company_id):
+    """Returns False if the student already followed the company."""
+    _, created = CompanyFollow.objects.get_or_create(student_id=student_id, company_id=company_id)
+    invalidate_students([student_id])
+    return created
+
+
+def unfollow(student_id, company_id):
+    deleted, _ = CompanyFollow.objects.filter(student_id=student_id, company_id=company_id).delete()
+    invalidate_students([student_id])
+    return bool(deleted)
+
+
+def invalidate_students(student_ids):
+    keys = [_head_key(student_id) for student_id in student_ids]
+    if keys:
+        # After commit, so a concurrent read cannot cache the old rows again
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_companies(company_ids):
+    """Drop the cached heads of every student following one of ``company_ids``."""
+    students = CompanyFollow.objects.filter(company_id__in=set(company_ids)).values_list('student_id', flat=True)
+    invalidate_students(set(students))
+
+
+def on_listing_change(sender, instance, raw=False, **kwargs):
+    """post_save / post_delete receiver for Vacancy and JobPost."""
+    if not raw:
+        invalidate_companies([instance.company_id])
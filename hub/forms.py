@@ -1,3 +1,5 @@
+import uuid
+
 from django import forms
 from django.contrib.auth import get_user_model
 from .models import CompanyProfile, Vacancy
@@ -9,6 +11,7 @@ from .models import (
     ApplicationCriminalHistory, ApplicationReferral, ApplicationEEO
 )
 from django.forms import inlineformset_factory, modelformset_factory
+from django.urls import reverse
 
 User = get_user_model()
 
@@ -82,7 +85,29 @@ class CompanyReviewForm(forms.ModelForm):
             'comment': forms.Textarea(attrs={'rows': 3}),
         }
 
+class ProtectedFileInput(forms.ClearableFileInput):
+    """ClearableFileInput whose "Currently" link goes to a download view, not MEDIA_URL."""
+
+    class _Link:
+        def __init__(self, value, url):
+            self.value, self.url = value, url
+
+        def __str__(self):
+            return str(self.value)
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def format_value(self, value):
+        value = super().format_value(value)
+        return self._Link(value, reverse(self.url_name)) if value else value
+
+
 class StudentProfileForm(forms.ModelForm):
+    # Set by the page script when the CV was sent as a resumable chunked upload
+    resume_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = StudentProfile
         fields = [
@@ -94,6 +119,7 @@ class StudentProfileForm(forms.ModelForm):
             'education_history': forms.Textarea(attrs={'rows': 4}),
             'work_experience': forms.Textarea(attrs={'rows': 4}),
             'default_cover_letter': forms.Textarea(attrs={'rows': 5}),
+            'resume': ProtectedFileInput('hub:student_resume'),
         }
 
 class JobPostForm(forms.ModelForm):
@@ -115,6 +141,8 @@ class JobPostForm(forms.ModelForm):
 
 class JobEasyApplyForm(forms.ModelForm):
     use_profile_cover = forms.BooleanField(required=False, initial=True, label="Use my saved cover letter")
+    # New per rendered form, so a resubmitted/retried POST can be recognised
+    idempotency_key = forms.UUIDField(required=False, widget=forms.HiddenInput, initial=uuid.uuid4)
     class Meta:
         model = JobApplication
         fields = ['cover_letter']
@@ -0,0 +1,242 @@
+"""
+Hiring-funnel rollups for the company dashboard.
+
+Every status an application goes through is logged in ApplicationStatusChange
+(submission via the post_save receiver connected in HubConfig.ready, or by
+job_apply_standard when a draft is first submitted; changes
+via status_changed(), which also pushes them to open applicant pages through
+hub/live.py). The same write bumps FunnelDaily, keyed by
+(job, day, status): ``entered`` for the new status and ``exited`` /
+``seconds_in_status`` for the old one. The dashboard then reads grouped sums
+over those rows instead of scanning JobApplication; rebuild() recomputes the
+rollups from the log (``python manage.py rebuild_funnel``).
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import live
+from .models import ApplicationStatusChange, FunnelDaily, JobApplication
+
+APPLIED, HIRED = 'APPLIED', 'HIRED'
+DEFAULT_DAYS = 30
+BULK_CHUNK = 500
+
+
+def _bump(job_id, day, status, entered=0, exited=0, seconds=0):
+    counters = dict(
+        entered=F('entered') + entered,
+        exited=F('exited') + exited,
+        seconds_in_status=F('seconds_in_status') + seconds,
+    )
+    row = FunnelDaily.objects.filter(job_id=job_id, date=day, status=status)
+    if row.update(**counters):
+        return
+    try:
+        with transaction.atomic():
+            FunnelDaily.objects.create(
+                job_id=job_id, date=day, status=status,
+                entered=entered, exited=exited, seconds_in_status=seconds,
+            )
+    except IntegrityError:
+        # Another request created the row first
+        row.update(**counters)
+
+
+def application_created(application):
+    """Log a submitted application; drafts (``submitted_at`` None) are not counted."""
+    with transaction.atomic():
+        ApplicationStatusChange.objects.create(
+            application=application, job_id=application.job_id,
+            to_status=application.status, changed_at=application.submitted_at,
+        )
+        _bump(application.job_id, timezone.localdate(application.submitted_at), application.status, entered=1)
+
+
+def status_changed(application, old_status):
+    """Record that ``application`` (already saved) moved from ``old_status`` to its current status."""
+    if old_status == application.status:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        since = (
+            application.status_changes.order_by('-changed_at', '-id')
+            .values_list('changed_at', flat=True).first()
+        ) or application.created_at
+        seconds = max(int((now - since).total_seconds()), 0)
+        ApplicationStatusChange.objects.create(
+            application=application, job_id=application.job_id,
+            from_status=old_status, to_status=application.status,
+            changed_at=now, seconds_in_status=seconds,
+        )
+        day = timezone.localdate(now)
+        _bump(application.job_id, day, old_status, exited=1, seconds=seconds)
+        _bump(application.job_id, day, application.status, entered=1)
+    live.status_changed(application)
+
+
+def bulk_status_changed(queryset, status):
+    """
+    Move the applications in ``queryset`` to ``status`` with one UPDATE per
+    chunk, logging the changes and bumping the rollups per (job, old status).
+    Call inside a transaction; returns how many applications changed.
+    """
+    rows = list(queryset.exclude(status=status).values_list('pk', 'job_id', 'status', 'created_at'))
+    now = timezone.now()
+    day = timezone.localdate(now)
+    exits = defaultdict(lambda: [0, 0])
+    entered = Counter()
+
+    for start in range(0, len(rows), BULK_CHUNK):
+        chunk = rows[start:start + BULK_CHUNK]
+        ids = [pk for pk, _, _, _ in chunk]
+        JobApplication.objects.filter(pk__in=ids).update(status=status)
+        since = dict(
+            ApplicationStatusChange.objects.filter(application_id__in=ids)
+            .values_list('application_id').annotate(Max('changed_at')).order_by()
+        )
+        changes = []
+        for pk, job_id, old_status, created_at in chunk:
+            seconds = max(int((now - since.get(pk, created_at)).total_seconds()), 0)
+            changes.append(ApplicationStatusChange(
+                application_id=pk, job_id=job_id, from_status=old_status, to_status=status,
+                changed_at=now, seconds_in_status=seconds,
+            ))
+            exits[job_id, old_status][0] += 1
+            exits[job_id, old_status][1] += seconds
+            entered[job_id] += 1
+        ApplicationStatusChange.objects.bulk_create(changes)
+
+    for (job_id, old_status), (count, seconds) in exits.items():
+        _bump(job_id, day, old_status, exited=count, seconds=seconds)
+    for job_id, count in entered.items():
+        _bump(job_id, day, status, entered=count)
+    live.statuses_changed([(pk, job_id) for pk, job_id, _, _ in rows], status)
+    return len(rows)
+
+
+def on_application_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for JobApplication."""
+    if created and not raw and instance.submitted_at is not None:
+        application_created(instance)
+
+
+def backfill_log(job_ids=None):
+    """
+    Log entries for submitted applications that predate the log: submitted as
+    APPLIED, then (if different) their current status, with no known time in
+    status.
+    """
+    apps = JobApplication.objects.filter(
+        ~Exists(ApplicationStatusChange.objects.filter(application=OuterRef('pk'))),
+        submitted_at__isnull=False,
+    )
+    if job_ids is not None:
+        apps = apps.filter(job_id__in=job_ids)
+    changes = []
+    for app in apps.only('pk', 'job_id', 'status', 'submitted_at').iterator():
+        changes.append(ApplicationStatusChange(
+            application_id=app.pk, job_id=app.job_id, to_status=APPLIED, changed_at=app.submitted_at,
+        ))
+        if app.status != APPLIED:
+            changes.append(ApplicationStatusChange(
+                application_id=app.pk, job_id=app.job_id, from_status=APPLIED,
+                to_status=app.status, changed_at=app.submitted_at,
+            ))
+    ApplicationStatusChange.objects.bulk_create(changes, batch_size=1000)
+    return len(changes)
+
+
+def rebuild(job_ids=None):
+    """Recompute FunnelDaily from the status log; returns the number of rollup rows."""
+    log = ApplicationStatusChange.objects.annotate(day=TruncDate('changed_at'))
+    if job_ids is not None:
+        log = log.filter(job_id__in=job_ids)
+
+    rows = defaultdict(lambda: {'entered': 0, 'exited': 0, 'seconds_in_status': 0})
+    for r in log.values('job_id', 'day', 'to_status').annotate(n=Count('id')).order_by():
+        rows[r['job_id'], r['day'], r['to_status']]['entered'] = r['n']
+    timed = log.exclude(from_status='').filter(seconds_in_status__isnull=False)
+    for r in timed.values('job_id', 'day', 'from_status').annotate(n=Count('id'), s=Sum('seconds_in_status')).order_by():
+        row = rows[r['job_id'], r['day'], r['from_status']]
+        row['exited'], row['seconds_in_status'] = r['n'], r['s']
+
+    with transaction.atomic():
+        stale = FunnelDaily.objects.all()
+        if job_ids is not None:
+            stale = stale.filter(job_id__in=job_ids)
+        stale.delete()
+        FunnelDaily.objects.bulk_create(
+            [
+                FunnelDaily(job_id=job_id, date=day, status=status, **counts)
+                for (job_id, day, status), counts in rows.items()
+            ],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def company_funnel(jobs, days=DEFAULT_DAYS):
+    """
+    Dashboard figures for the job posts ``jobs``, from the rollups only:
+    applications per day over the last ``days`` days, per-job totals by status
+    with APPLIED -> HIRED conversion, and the average days spent in each status.
+    """
+    rollup = FunnelDaily.objects.filter(job__in=jobs)
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+
+    per_day = dict(
+        rollup.filter(status=APPLIED, date__gte=start)
+        .values_list('date').annotate(n=Sum('entered')).order_by()
+    )
+    peak = max(per_day.values(), default=0)
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        count = per_day.get(day, 0)
+        daily.append({'date': day, 'count': count, 'pct': round(100 * count / peak) if peak else 0})
+
+    per_job = defaultdict(dict)
+    for job_id, status, n in rollup.values_list('job_id', 'status').annotate(n=Sum('entered')).order_by():
+        per_job[job_id][status] = n
+    labels = dict(JobApplication.STATUS_CHOICES)
+    stages = {}
+    for job_id, counts in per_job.items():
+        applied = counts.get(APPLIED, 0)
+        stages[job_id] = {
+            'applied': applied,
+            'conversion': round(100 * counts.get(HIRED, 0) / applied, 1) if applied else None,
+            'stages': [
+                {
+                    'label': labels[status],
+                    'count': counts.get(status, 0),
+                    'pct': round(100 * counts.get(status, 0) / applied) if applied else 0,
+                }
+                for status in labels
+            ],
+        }
+
+    exits = {
+        status: (exited, seconds)
+        for status, exited, seconds in (
+            rollup.values_list('status').annotate(e=Sum('exited'), s=Sum('seconds_in_status')).order_by()
+        )
+    }
+    time_in_status = [
+        {'label': label, 'days': round(exits[status][1] / exits[status][0] / 86400, 1)}
+        for status, label in labels.items()
+        if exits.get(status, (0, 0))[0]
+    ]
+
+    return {
+        'days': days,
+        'daily': daily,
+        'daily_total': sum(per_day.values()),
+        'by_job': stages,
+        'time_in_status': time_in_status,
+    }
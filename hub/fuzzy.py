@@ -0,0 +1,118 @@
+"""
+Typo-tolerant search for job posts and companies.
+
+Job post titles/departments and company names are broken into trigrams
+(pg_trgm style: lower-cased words padded with two leading blanks and one
+trailing blank) and stored in SearchTrigram, kept current by post_save /
+post_delete receivers connected in HubConfig.ready. A query is scored
+against a row by the share of its own trigrams the row contains, so
+"sofware enginer" still finds "Senior Software Engineer". Candidates come
+from one indexed ``gram IN (...)`` lookup, grouped and capped in SQL.
+
+job_search() uses this only when the exact substring search finds fewer
+than FALLBACK_BELOW jobs.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import CompanyProfile, JobPost, SearchTrigram
+
+FALLBACK_BELOW = 5
+# Share of the query's trigrams a match must contain
+THRESHOLD = 0.5
+MAX_CANDIDATES = 200
+MAX_MATCHES = 50
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(text):
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _text(obj):
+    if isinstance(obj, CompanyProfile):
+        return 'COMPANY', obj.name
+    return 'JOB', f"{obj.title} {obj.department}"
+
+
+def index(objects):
+    """(Re)index job posts and/or companies."""
+    rows, keys = [], {}
+    for obj in objects:
+        kind, text = _text(obj)
+        keys.setdefault(kind, []).append(obj.pk)
+        rows.extend(SearchTrigram(kind=kind, object_id=obj.pk, gram=gram) for gram in trigrams(text))
+    with transaction.atomic():
+        for kind, ids in keys.items():
+            SearchTrigram.objects.filter(kind=kind, object_id__in=ids).delete()
+        SearchTrigram.objects.bulk_create(rows, batch_size=1000)
+
+
+def on_save(sender, instance, raw=False, **kwargs):
+    """post_save receiver for JobPost and CompanyProfile."""
+    if not raw:
+        index([instance])
+
+
+def on_delete(sender, instance, **kwargs):
+    kind, _ = _text(instance)
+    SearchTrigram.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def search(kind, text, limit=MAX_CANDIDATES):
+    """``{object_id: score}`` for rows of ``kind`` close to ``text``, at most ``limit``."""
+    grams = trigrams(text)
+    if not grams:
+        return {}
+    rows = (
+        SearchTrigram.objects.filter(kind=kind, gram__in=grams)
+        .values_list('object_id').annotate(n=Count('id')).order_by('-n')[:limit]
+    )
+    scores = {object_id: n / len(grams) for object_id, n in rows}
+    return {object_id: score for object_id, score in scores.items() if score >= THRESHOLD}
+
+
+def job_matches(text):
+    """
+    ``{job id: score}`` for the best MAX_MATCHES active job posts whose
+    title/department, or company name, is close to ``text``.
+    """
+    scores = search('JOB', text)
+    companies = search('COMPANY', text, limit=MAX_MATCHES)
+    if companies:
+        company_jobs = (
+            JobPost.objects.filter(company_id__in=companies, is_active=True)
+            .values_list('pk', 'company_id')[:MAX_CANDIDATES]
+        )
+        for pk, company_id in company_jobs:
+            scores[pk] = max(scores.get(pk, 0), companies[company_id])
+    best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:MAX_MATCHES]
+    return dict(best)
+
+
+def rebuild(batch_size=1000):
+    """Reindex every job post and company; returns how many were indexed."""
+    SearchTrigram.objects.all().delete()
+    count = 0
+    for queryset in (
+        JobPost.objects.only('pk', 'title', 'department'),
+        CompanyProfile.objects.only('pk', 'name'),
+    ):
+        batch = []
+        for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            index(batch)
+            count += len(batch)
+    return count
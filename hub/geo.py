@@ -0,0 +1,164 @@
+"""
+Offline gazetteer of Kenyan counties and towns (hub/data/kenya_places.csv).
+
+Free-text ``location`` / ``region`` values are matched against it on save
+(apply()), which fills the indexed ``county_code`` / ``latitude`` /
+``longitude`` columns on Vacancy, JobPost and CompanyProfile. Coordinates are
+town level (a county resolves to its headquarters town), which is as precise
+as the free text allows.
+
+within() answers "within X km of <place>": an indexed bounding-box filter on
+latitude/longitude first, then the exact great-circle distance, annotated as
+``distance_km``.
+"""
+import csv
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.db.models import F
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'kenya_places.csv')
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+
+# Trailing words that do not change which place is meant
+_NOISE_WORDS = {'county', 'city', 'town', 'cbd', 'municipality', 'kenya', 'sub', 'area'}
+_SPLIT_RE = re.compile(r'[,;/()|]|\s-\s')
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    kind: str           # 'county' or 'town'
+    county_code: str
+    latitude: float
+    longitude: float
+
+    @property
+    def county(self):
+        return counties()[self.county_code]
+
+
+def normalize(text):
+    text = text.lower().replace("'", '').replace('’', '').replace('-', ' ').replace('.', ' ')
+    words = _PUNCT_RE.sub(' ', text).split()
+    while words and words[-1] in _NOISE_WORDS:
+        words.pop()
+    return ' '.join(words)
+
+
+@lru_cache(maxsize=1)
+def _index():
+    places = {}
+    with open(DATA_FILE, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            place = Place(
+                name=row['name'],
+                kind=row['kind'],
+                county_code=row['county_code'],
+                latitude=float(row['latitude']),
+                longitude=float(row['longitude']),
+            )
+            for name in [row['name'], *filter(None, row['aliases'].split('|'))]:
+                places.setdefault(normalize(name), place)
+    return places
+
+
+@lru_cache(maxsize=1)
+def counties():
+    """``{county_code: county name}`` in code order."""
+    return {
+        place.county_code: place.name
+        for place in sorted(_index().values(), key=lambda p: p.county_code)
+        if place.kind == 'county'
+    }
+
+
+def lookup(text):
+    """
+    The place named in ``text`` ("Westlands, Nairobi", "Nakuru County",
+    "near kitengela"), or None. A town wins over a county mentioned in the
+    same text; otherwise the longest, earliest match wins.
+    """
+    if not text:
+        return None
+    index = _index()
+    found = []
+    for part in _SPLIT_RE.split(text):
+        words = normalize(part).split()
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                place = index.get(' '.join(words[start:start + size]))
+                if place is not None:
+                    found.append(place)
+    if not found:
+        return None
+    return next((place for place in found if place.kind == 'town'), found[0])
+
+
+def locate(*texts):
+    """The first of ``texts`` (most specific first) that names a known place."""
+    for text in texts:
+        place = lookup(text)
+        if place is not None:
+            return place
+    return None
+
+
+def apply(obj):
+    """Set county_code / latitude / longitude on a listing or company from its location and region."""
+    place = locate(obj.location, obj.region)
+    if place is None:
+        obj.county_code, obj.latitude, obj.longitude = '', None, None
+    else:
+        obj.county_code, obj.latitude, obj.longitude = place.county_code, place.latitude, place.longitude
+
+
+def parse_radius(value):
+    try:
+        km = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RADIUS_KM
+    return min(max(km, 1), MAX_RADIUS_KM)
+
+
+def bounding_box(latitude, longitude, km):
+    dlat = km / KM_PER_DEGREE
+    dlon = km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (latitude - dlat, latitude + dlat), (longitude - dlon, longitude + dlon)
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from a point to each row's latitude/longitude, as an expression."""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    a = (
+        Power(Sin((Radians(F('latitude')) - lat) / 2), 2)
+        + math.cos(lat) * Cos(Radians(F('latitude'))) * Power(Sin((Radians(F('longitude')) - lon) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def km_between(place, latitude, longitude):
+    """Haversine distance in km from ``place`` to a point, in Python (see distance_km())."""
+    lat1, lat2 = math.radians(place.latitude), math.radians(latitude)
+    dlat, dlon = lat2 - lat1, math.radians(longitude - place.longitude)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def within(queryset, place, km):
+    lat_range, lon_range = bounding_box(place.latitude, place.longitude, km)
+    return (
+        queryset.filter(latitude__range=lat_range, longitude__range=lon_range)
+        .annotate(distance_km=distance_km(place.latitude, place.longitude))
+        .filter(distance_km__lte=km)
+    )
@@ -0,0 +1,182 @@
+"""
+Bulk import of vacancies and job posts from CSV or JSONL.
+
+Used by the ``import_listings`` management command and the "Import" page on
+the Vacancy / JobPost admin. Columns (CSV) or keys (JSONL) are the fields of
+VacancyForm / JobPostForm; missing ones take the model defaults.
+
+The company is loaded, and its permission to post checked, once. Each row is
+validated with the same form the dashboard uses (no queries beyond the
+near-duplicate lookup), rows that repeat an earlier row of the same file are
+rejected like reposts of a live listing, and valid rows are inserted with bulk_create in
+chunked transactions, with their dedup fingerprints, instead of one save()
+(and second full_clean()) per row.
+"""
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass, field
+
+from django import forms
+from django.db import transaction
+
+from . import dedup, feed, fuzzy, geo, snapshots
+from .forms import JobPostForm, VacancyForm
+from .models import JobPost
+
+FORMS = {
+    'vacancy': VacancyForm,
+    'job': JobPostForm,
+}
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 500
+
+_TRUE_STRINGS = {'1', 'true', 'yes', 'y', 'on'}
+
+
+class ImportRejected(Exception):
+    """The import cannot run at all (as opposed to individual bad rows)."""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)   # [(line number, message), ...]
+    dry_run: bool = False
+
+
+def format_for(filename):
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    return 'jsonl' if ext in ('jsonl', 'ndjson', 'json') else ext
+
+
+def read_rows(fileobj, fmt):
+    """
+    Yield ``(line number, row dict)`` from a binary file; rows that cannot be
+    parsed come through as ``(line number, error message)``.
+    """
+    if fmt not in FORMATS:
+        raise ImportRejected(f"Unsupported format {fmt!r}; use CSV or JSONL.")
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {
+                key.strip(): (value or '').strip() for key, value in row.items() if key
+            }
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, f"Invalid JSON: {exc}"
+            continue
+        yield number, row if isinstance(row, dict) else "Expected a JSON object."
+
+
+def _error_text(errors):
+    parts = []
+    for name, messages in errors.items():
+        text = ' '.join(messages)
+        parts.append(text if name == '__all__' else f"{name}: {text}")
+    return '; '.join(parts)
+
+
+class _RowValidator:
+    def __init__(self, company, kind):
+        self.company = company
+        self.form_class = FORMS[kind]
+        fields = self.form_class.base_fields
+        self.defaults = {name: f.initial for name, f in fields.items() if f.initial is not None}
+        self.booleans = {name for name, f in fields.items() if isinstance(f, forms.BooleanField)}
+        # Rows accepted so far in this run: band key -> [(signature, title), ...]
+        self.accepted = {}
+
+    def _repeated_row(self, signature):
+        """The best ``(title, similarity)`` among the rows accepted earlier in this run, if any."""
+        cutoff = dedup.threshold()
+        best = None
+        for key in dedup.band_keys(self.company.pk, signature):
+            for other, title in self.accepted.get(key, ()):
+                score = dedup.similarity(signature, other)
+                if score >= cutoff and (best is None or score > best[1]):
+                    best = (title, score)
+        return best
+
+    def __call__(self, row):
+        """``(listing, matches)`` for a valid row, or an error message."""
+        data = dict(self.defaults)
+        data.update((key, value) for key, value in row.items() if key in self.form_class.base_fields)
+        for name in self.booleans:
+            if isinstance(data.get(name), str):
+                data[name] = data[name].strip().lower() in _TRUE_STRINGS
+
+        form = self.form_class(data)
+        form.instance.company = self.company
+        if not form.is_valid():
+            return _error_text(form.errors)
+        listing = form.save(commit=False)
+
+        text = dedup.listing_text(listing)
+        matches = dedup.find_near_duplicates(self.company, text)
+        live = dedup.active_duplicate(matches)
+        if live:
+            fp, score = live
+            return f"Repost of the live listing \"{fp.title}\" ({score:.0%} similar)."
+        # Not indexed until its batch is inserted (or at all, on a dry run)
+        signature = dedup.minhash(text)
+        repeated = self._repeated_row(signature)
+        if repeated:
+            title, score = repeated
+            return f"Repeats the row \"{title}\" earlier in this file ({score:.0%} similar)."
+        for key in dedup.band_keys(self.company.pk, signature):
+            self.accepted.setdefault(key, []).append((signature, listing.title))
+        # What save() would have done
+        geo.apply(listing)
+        return listing, matches
+
+
+def _insert(model, pending):
+    listings = [listing for listing, _ in pending]
+    with transaction.atomic():
+        model.objects.bulk_create(listings)
+        dedup.index_new_listings(pending)
+        if model is JobPost:
+            fuzzy.index(listings)
+
+
+def import_listings(company, kind, rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Validate and insert ``rows`` from read_rows() for ``company``; returns an ImportResult."""
+    if not company.can_post:
+        raise ImportRejected(f"{company} is not verified and approved to post listings.")
+    validate = _RowValidator(company, kind)
+    model = validate.form_class._meta.model
+    result = ImportResult(dry_run=dry_run)
+    pending = []
+
+    for line, row in rows:
+        result.rows += 1
+        outcome = row if isinstance(row, str) else validate(row)
+        if isinstance(outcome, str):
+            result.errors.append((line, outcome))
+            continue
+        pending.append(outcome)
+        if len(pending) >= batch_size:
+            if not dry_run:
+                _insert(model, pending)
+            result.created += len(pending)
+            pending = []
+
+    if pending:
+        if not dry_run:
+            _insert(model, pending)
+        result.created += len(pending)
+    if result.created and not dry_run:
+        # bulk_create sends no post_save
+        snapshots.mark_stale([company.pk])
+        feed.invalidate_companies([company.pk])
+    return result
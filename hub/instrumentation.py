@@ -0,0 +1,195 @@
+"""
+Per-request timing of database, template rendering and cache work.
+
+ServerTimingMiddleware (hub/middleware.py) opens a RequestTiming for sampled
+requests and stores it in a context variable. The hooks below add to it:
+
+* db_execute_wrapper, installed on every DB connection by HubConfig.ready(),
+  so queries run from sync_to_async threads are counted too;
+* TimedDjangoTemplates, the template backend configured in TEMPLATES;
+* TimedCacheMixin / LocMemCache / RedisCache, the cache backends configured
+  in CACHES.
+
+With no RequestTiming active each hook is a single context-variable lookup
+(plus the query/cache counters kept for /metrics, see hub/metrics.py).
+"""
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+
+DEFAULTS = {
+    'SAMPLE_RATE': 1.0,         # fraction of requests that get db/render/cache detail
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+}
+
+_current = contextvars.ContextVar('hub_request_timing', default=None)
+_MISSING = object()
+
+
+def timing_settings():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_TIMING', {})}
+
+
+class RequestTiming:
+    """Accumulated timings (in seconds) for one request."""
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_s = slow_query_ms / 1000
+        self.db = 0.0
+        self.db_queries = 0
+        self.render = 0.0
+        self.cache = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.templates = defaultdict(float)
+        self.slow_queries = []
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+
+def current_timing():
+    return _current.get()
+
+
+_SQL_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST_RE = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_SQL_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Strip literals and collapse IN lists so equivalent queries group together."""
+    sql = _SQL_STRING_RE.sub('?', sql)
+    sql = _SQL_NUMBER_RE.sub('?', sql)
+    sql = _SQL_IN_LIST_RE.sub('(...)', sql)
+    return _SQL_SPACE_RE.sub(' ', sql).strip()
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    metrics.count_db_query()
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timing.db += elapsed
+        timing.db_queries += 1
+        if elapsed >= timing.slow_query_s:
+            timing.slow_queries.append((sql, elapsed))
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed = time.perf_counter() - started
+            timing.render += elapsed
+            timing.templates[self.template.name or '<string>'] += elapsed
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class TimedCacheMixin:
+    """Times cache calls and counts get() hits/misses for the active request."""
+
+    def _timed(self, method, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timing.cache += time.perf_counter() - started
+
+    def get(self, key, default=None, version=None):
+        value = self._timed(super().get, key, _MISSING, version)
+        metrics.count_cache_get(value is not _MISSING)
+        timing = _current.get()
+        if value is _MISSING:
+            if timing is not None:
+                timing.cache_misses += 1
+            return default
+        if timing is not None:
+            timing.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        return self._timed(super().get_many, keys, version)
+
+    def set(self, *args, **kwargs):
+        return self._timed(super().set, *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._timed(super().add, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._timed(super().delete, *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self._timed(super().set_many, *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._timed(super().delete_many, *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self._timed(super().incr, *args, **kwargs)
+
+
+class LocMemCache(TimedCacheMixin, BaseLocMemCache):
+    pass
+
+
+class RedisCache(TimedCacheMixin, BaseRedisCache):
+    """Shared by all workers; needs the optional ``redis`` package."""
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: the record's ``payload`` plus a timestamp."""
+
+    def format(self, record):
+        payload = {'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), 'event': record.getMessage()}
+        payload.update(getattr(record, 'payload', {}))
+        return json.dumps(payload, default=str)
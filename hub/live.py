@@ -0,0 +1,202 @@
+"""
+Live applicant updates for company_job_applicants, over Server-Sent Events.
+
+Events are published to an append-only file per job and day under
+LIVE_EVENTS_DIR (``job-<id>-<YYYYMMDD>.jsonl``), one JSON line each, written
+with a single O_APPEND write so lines from concurrent workers do not
+interleave. Any worker on the host can then serve any subscriber: the
+stream (async_views.company_job_applicant_events) polls the file size every
+POLL_SECONDS, in a worker thread so the event loop never waits on the disk,
+and sends the lines past its offset (reading up to MAX_READ at a time, or on
+to the end of a single longer event). The event id is
+``<day>-<byte offset>``, so a reconnecting EventSource resumes from
+Last-Event-ID without missing or repeating anything.
+
+Published:
+
+* ``application``: a new application, with its card rendered from
+  hub/includes/applicant_card.html (post_save receiver connected in
+  HubConfig.ready, sent after commit);
+* ``status``: an application's new status (called from funnel.status_changed
+  and funnel.bulk_status_changed, which every status change goes through).
+
+Files older than KEEP_DAYS are removed when a job's first event of the day
+is written.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .models import JobApplication
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 1.0
+KEEPALIVE_SECONDS = 20
+# Streams end after this long; EventSource reconnects with Last-Event-ID
+STREAM_SECONDS = 300
+RETRY_MS = 3000
+KEEP_DAYS = 2
+MAX_READ = 256 * 1024
+
+
+def _dir():
+    return os.fspath(getattr(settings, 'LIVE_EVENTS_DIR', settings.BASE_DIR / 'logs' / 'live'))
+
+
+def _today():
+    return time.strftime('%Y%m%d', time.gmtime())
+
+
+def _path(job_id, day):
+    return os.path.join(_dir(), f"job-{job_id}-{day}.jsonl")
+
+
+def _days(job_id):
+    prefix = f"job-{job_id}-"
+    try:
+        names = os.listdir(_dir())
+    except FileNotFoundError:
+        return []
+    return sorted(name[len(prefix):-len('.jsonl')] for name in names if name.startswith(prefix))
+
+
+def _size(path):
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _remove_old(job_id, today):
+    cutoff = time.strftime('%Y%m%d', time.gmtime(time.time() - KEEP_DAYS * 86400))
+    for day in _days(job_id):
+        if day < cutoff and day != today:
+            try:
+                os.remove(_path(job_id, day))
+            except FileNotFoundError:
+                pass
+
+
+def publish(job_id, events):
+    """Append ``[(event name, data), ...]`` to the job's event file."""
+    if not events:
+        return
+    payload = b''.join(
+        json.dumps({'event': name, 'data': data}, separators=(',', ':')).encode() + b'\n'
+        for name, data in events
+    )
+    day = _today()
+    path = _path(job_id, day)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(_dir(), exist_ok=True)
+            _remove_old(job_id, day)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Subscribers miss the update until they reload; the request must not fail
+        logger.exception("Could not publish live events for job %s", job_id)
+
+
+def _status_data(application_id, status, label):
+    return {'id': application_id, 'status': status, 'label': label}
+
+
+def application_created(application):
+    html = render_to_string('hub/includes/applicant_card.html', {'app': application})
+    publish(application.job_id, [('application', {'id': application.pk, 'status': application.status, 'html': html})])
+
+
+def status_changed(application):
+    data = _status_data(application.pk, application.status, application.get_status_display())
+    transaction.on_commit(lambda: publish(application.job_id, [('status', data)]))
+
+
+def statuses_changed(rows, status):
+    """``rows`` are ``(application id, job id)`` pairs moved to ``status``, published once per job."""
+    label = dict(JobApplication.STATUS_CHOICES)[status]
+    per_job = {}
+    for pk, job_id in rows:
+        per_job.setdefault(job_id, []).append(('status', _status_data(pk, status, label)))
+
+    def send():
+        for job_id, events in per_job.items():
+            publish(job_id, events)
+    transaction.on_commit(send)
+
+
+def on_application_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for JobApplication."""
+    if created and not raw:
+        transaction.on_commit(lambda: application_created(instance))
+
+
+def position(job_id):
+    """Event id of the end of the job's stream: a page rendered now subscribes from here."""
+    day = _today()
+    return f"{day}-{_size(_path(job_id, day))}"
+
+
+def parse_event_id(value):
+    """``(day, offset)`` from an event id, or None."""
+    day, _, offset = (value or '').partition('-')
+    if len(day) != 8 or not day.isdigit() or not offset.isdigit():
+        return None
+    return day, int(offset)
+
+
+def read(job_id, day, offset):
+    """``(events, day, offset)``: complete events after ``offset`` in ``day``'s file, moving on to later days."""
+    path = _path(job_id, day)
+    if _size(path) <= offset:
+        later = [d for d in _days(job_id) if d > day] if day < _today() else []
+        if later:
+            return [], later[0], 0
+        return [], day, offset
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read(MAX_READ)
+        # One event longer than MAX_READ: read on to its end
+        while b'\n' not in chunk:
+            more = f.read(MAX_READ)
+            if not more:
+                break
+            chunk += more
+    events = []
+    # A line without its newline is still being written
+    for line in chunk[:chunk.rfind(b'\n') + 1].splitlines(keepends=True):
+        offset += len(line)
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        events.append((f"{day}-{offset}", message['event'], message['data']))
+    return events, day, offset
+
+
+async def stream(job_id, last_event_id=None):
+    """The text/event-stream body for one subscriber."""
+    day, offset = parse_event_id(last_event_id) or parse_event_id(await asyncio.to_thread(position, job_id))
+    yield f"retry: {RETRY_MS}\n\n"
+    started = quiet_since = time.monotonic()
+    while time.monotonic() - started < STREAM_SECONDS:
+        events, day, offset = await asyncio.to_thread(read, job_id, day, offset)
+        for event_id, name, data in events:
+            yield f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+        now = time.monotonic()
+        if events:
+            quiet_since = now
+        elif now - quiet_since >= KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            quiet_since = now
+        await asyncio.sleep(POLL_SECONDS)
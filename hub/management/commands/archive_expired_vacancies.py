@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from hub import feed
 from hub.models import Vacancy
+from hub.snapshots import mark_stale
 
 class Command(BaseCommand):
     help = "Deactivate expired vacancies"
@@ -8,5 +10,8 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         today = timezone.now().date()
         expired = Vacancy.objects.filter(is_active=True, deadline__lt=today)
+        companies = set(expired.values_list("company_id", flat=True))
         count = expired.update(is_active=False)
+        mark_stale(companies)
+        feed.invalidate_companies(companies)
         self.stdout.write(self.style.SUCCESS(f"Archived {count} expired vacancies."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from hub.archive import DEFAULT_BATCH_SIZE, archive_after_days, archive_listings
+
+class Command(BaseCommand):
+    help = "Move long-expired vacancies and closed job posts (with their applications) into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Archive listings closed for more than this many days (default: ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else archive_after_days()
+        vacancies, jobs = archive_listings(days=days, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {vacancies} vacancies and {jobs} job posts closed for more than {days} days."
+        ))
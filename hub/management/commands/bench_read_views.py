@@ -0,0 +1,107 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncRequestFactory, RequestFactory
+from django.utils import timezone
+
+from hub import async_views, views
+from hub.models import CompanyProfile, JobPost, Vacancy
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent clients against the public read views in this process: sync views "
+        "on a fixed pool of threads standing in for WSGI workers vs async views on one event "
+        "loop standing in for an ASGI server. Views are called through RequestFactory, without "
+        "middleware, HTTP or a server, and --client-latency is a sleep modelling slow clients "
+        "holding the connection (a WSGI worker stays busy for it; the event loop does not). "
+        "It compares the two concurrency models, not gunicorn and uvicorn themselves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50, help="Concurrent clients")
+        parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+        parser.add_argument("--workers", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--client-latency", type=float, default=0.05,
+                            help="Seconds each client keeps its connection open to receive the response")
+
+    def handle(self, *args, **options):
+        targets = self._targets()
+        if not targets:
+            raise CommandError("No data to benchmark; create some vacancies/jobs first.")
+        clients, per_client = options["clients"], options["requests"]
+        latency = options["client_latency"]
+
+        wsgi = self._run_wsgi(targets, clients, per_client, options["workers"], latency)
+        asgi = asyncio.run(self._run_asgi(targets, clients, per_client, latency))
+
+        self.stdout.write(f"{clients} clients x {per_client} requests, client latency {latency * 1000:.0f} ms")
+        self.stdout.write(f"{'model':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'wall s':>8}")
+        for label, (wall, samples) in (("WSGI", wsgi), ("ASGI", asgi)):
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            self.stdout.write(
+                f"{label:<6} {len(samples) / wall:>9.1f} {statistics.median(samples) * 1000:>9.1f} "
+                f"{p95 * 1000:>9.1f} {wall:>8.2f}"
+            )
+
+    def _targets(self):
+        """(view name, path, kwargs) for every read view that has data."""
+        today = timezone.now().date()
+        targets = [("vacancy_list", "/attachments/", {}), ("job_list", "/jobs/", {})]
+        vacancy = Vacancy.objects.filter(is_active=True, deadline__gte=today).first()
+        job = JobPost.objects.filter(is_active=True).first()
+        company = CompanyProfile.objects.first()
+        if not (vacancy or job or company):
+            return []
+        if vacancy:
+            targets.append(("vacancy_detail", f"/attachments/{vacancy.pk}/", {"pk": vacancy.pk}))
+        if job:
+            targets.append(("job_detail", f"/jobs/{job.pk}/", {"pk": job.pk}))
+        if company:
+            targets.append(("company_profile", f"/companies/{company.pk}/", {"company_id": company.pk}))
+        return targets
+
+    def _run_wsgi(self, targets, clients, per_client, workers, latency):
+        factory = RequestFactory()
+        worker_slots = threading.Semaphore(workers)
+
+        def client(c):
+            samples = []
+            for r in range(per_client):
+                name, path, kwargs = targets[(c * per_client + r) % len(targets)]
+                started = time.perf_counter()
+                with worker_slots:  # wait for a free worker, like a queued connection
+                    response = getattr(views, name)(factory.get(path), **kwargs)
+                    response.content
+                    # The worker thread is blocked until the slow client has the body
+                    time.sleep(latency)
+                samples.append(time.perf_counter() - started)
+            close_old_connections()
+            return samples
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            samples = [s for per_client_samples in pool.map(client, range(clients)) for s in per_client_samples]
+        return time.perf_counter() - started, samples
+
+    async def _run_asgi(self, targets, clients, per_client, latency):
+        factory = AsyncRequestFactory()
+        samples = []
+
+        async def client(c):
+            for r in range(per_client):
+                name, path, kwargs = targets[(c * per_client + r) % len(targets)]
+                started = time.perf_counter()
+                response = await getattr(async_views, name)(factory.get(path), **kwargs)
+                response.content
+                await asyncio.sleep(latency)
+                samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(c) for c in range(clients)))
+        return time.perf_counter() - started, samples
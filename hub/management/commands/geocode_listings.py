@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from hub import geo
+from hub.models import CompanyProfile, JobPost, Vacancy
+
+GEO_FIELDS = ['county_code', 'latitude', 'longitude']
+
+class Command(BaseCommand):
+    help = "Fill county codes and coordinates from location/region using the bundled gazetteer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        located = total = 0
+        for model in (CompanyProfile, Vacancy, JobPost):
+            batch = []
+            for obj in model.objects.only('pk', 'location', 'region', *GEO_FIELDS).iterator():
+                geo.apply(obj)
+                batch.append(obj)
+                total += 1
+                located += obj.latitude is not None
+                if len(batch) >= options["batch_size"]:
+                    model.objects.bulk_update(batch, GEO_FIELDS)
+                    batch = []
+            model.objects.bulk_update(batch, GEO_FIELDS)
+        self.stdout.write(self.style.SUCCESS(f"Located {located} of {total} companies and listings."))
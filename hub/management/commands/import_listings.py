@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from hub.importer import DEFAULT_BATCH_SIZE, FORMS, ImportRejected, format_for, import_listings, read_rows
+from hub.models import CompanyProfile
+
+class Command(BaseCommand):
+    help = "Import attachment vacancies or job posts for one company from a CSV or JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--company", required=True,
+                            help="Company id or registration number")
+        parser.add_argument("--kind", choices=sorted(FORMS), default="vacancy")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                            help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate every row but insert nothing")
+        parser.add_argument("--max-errors", type=int, default=50,
+                            help="Row errors to print (all are counted)")
+
+    def handle(self, *args, **options):
+        key = options["company"]
+        lookup = Q(registration_number=key) | (Q(pk=key) if key.isdigit() else Q())
+        company = CompanyProfile.objects.filter(lookup).first()
+        if company is None:
+            raise CommandError(f"No company with id or registration number {key!r}.")
+
+        try:
+            with open(options["path"], "rb") as fh:
+                rows = read_rows(fh, options["format"] or format_for(options["path"]))
+                result = import_listings(
+                    company, options["kind"], rows,
+                    batch_size=options["batch_size"], dry_run=options["dry_run"],
+                )
+        except (OSError, ImportRejected) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors[:options["max_errors"]]:
+            self.stderr.write(f"line {line}: {message}")
+        if len(result.errors) > options["max_errors"]:
+            self.stderr.write(f"... and {len(result.errors) - options['max_errors']} more errors")
+
+        verb = "Would import" if result.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.created} of {result.rows} rows for {company.name} "
+            f"({len(result.errors)} rejected)."
+        ))
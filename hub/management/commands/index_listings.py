@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from hub import dedup
+from hub.models import Vacancy, JobPost, ListingFingerprint
+
+class Command(BaseCommand):
+    help = "Rebuild near-duplicate fingerprints for existing vacancies and job posts"
+
+    def handle(self, *args, **options):
+        ListingFingerprint.objects.all().delete()
+        count = 0
+        for model in (Vacancy, JobPost):
+            # Oldest first, so a repost is flagged against the listing it copies
+            for listing in model.objects.order_by('created_at').iterator():
+                kind = 'VACANCY' if model is Vacancy else 'JOB'
+                matches = dedup.find_near_duplicates(
+                    listing.company, dedup.listing_text(listing), exclude=(kind, listing.pk)
+                )
+                dedup.index_listing(listing, matches)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} listings."))
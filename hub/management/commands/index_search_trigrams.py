@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from hub import fuzzy
+
+class Command(BaseCommand):
+    help = "Rebuild the trigram index behind typo-tolerant job and company search"
+
+    def handle(self, *args, **options):
+        count = fuzzy.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} job posts and companies."))
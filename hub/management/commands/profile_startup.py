@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PHASE_MARK = "hub-profile-phase:"
+
+# Runs in a fresh interpreter under -X importtime; phases are marked on stderr
+# so each import can be charged to the step that triggered it.
+CHILD = r'''
+import json, os, resource, sys, time
+
+def phase(name):
+    sys.stderr.write("%s %s\n" % (MARK, name))
+    sys.stderr.flush()
+
+MARK, warm, urls = sys.argv[1], sys.argv[2] == "warm", sys.argv[3:]
+result = {"steps": [], "requests": []}
+
+phase("django.setup")
+started = time.perf_counter()
+import django
+django.setup()
+result["setup"] = time.perf_counter() - started
+
+phase("urlconf")
+started = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+result["urlconf"] = time.perf_counter() - started
+
+phase("harness")
+from django.conf import settings
+from django.test import Client
+hosts = [h for h in settings.ALLOWED_HOSTS if h not in ("*",) and not h.startswith(".")]
+client = Client(HTTP_HOST=hosts[0] if hosts else "localhost")
+
+if warm:
+    phase("warm_up")
+    from hub.warmup import warm_up
+    result["steps"] = warm_up()
+
+for url in urls:
+    phase("GET " + url)
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        status = client.get(url).status_code
+        timings.append(time.perf_counter() - started)
+    result["requests"].append([url, status] + timings)
+
+phase("done")
+result["maxrss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps(result))
+'''
+
+_IMPORT_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a cold worker: import time per module and per startup phase, and the cost of "
+        "the first requests with and without the warm-up hook (hub/warmup.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", dest="urls",
+                            help="Path to request (repeatable; default: /, /attachments/, /jobs/, /about/)")
+        parser.add_argument("--top", type=int, default=15, help="Modules to list by import time")
+
+    def handle(self, *args, **options):
+        urls = options["urls"] or ["/", "/attachments/", "/jobs/", "/about/"]
+        cold, cold_imports = self._run("cold", urls)
+        warm, warm_imports = self._run("warm", urls)
+
+        self.stdout.write(f"django.setup(): {cold['setup'] * 1000:.0f} ms, "
+                          f"root URLconf: {cold['urlconf'] * 1000:.0f} ms")
+
+        self.stdout.write("\nImport time by phase (cold worker):")
+        for phase, modules in cold_imports.items():
+            total = sum(us for depth, _, us in modules if depth == 0)
+            if total:
+                self.stdout.write(f"  {phase:<28} {total / 1000:8.1f} ms  {len(modules):4d} modules")
+
+        self.stdout.write(f"\nSlowest imports (cumulative, cold worker), top {options['top']}:")
+        ranked = sorted(
+            ((us, name, phase) for phase, modules in cold_imports.items() for depth, name, us in modules if depth == 0),
+            reverse=True,
+        )
+        for us, name, phase in ranked[:options["top"]]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {name:<45} ({phase})")
+
+        self.stdout.write("\nWarm-up steps:")
+        for name, seconds, detail in warm["steps"]:
+            self.stdout.write(f"  {name:<12} {seconds * 1000:8.1f} ms  {detail}")
+
+        self.stdout.write("\nRequests (ms)            cold first  cold second  warmed first")
+        for (url, status, first, second), (_, _, warmed, _) in zip(cold["requests"], warm["requests"]):
+            self.stdout.write(f"  {url:<22} {first * 1000:10.1f} {second * 1000:12.1f} {warmed * 1000:13.1f}   [{status}]")
+        late = sum(len(v) for k, v in cold_imports.items() if k.startswith("GET "))
+        late_warm = sum(len(v) for k, v in warm_imports.items() if k.startswith("GET "))
+        self.stdout.write(f"\nModules first imported while serving requests: {late} cold, {late_warm} after warm-up")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Peak RSS per worker: {cold['maxrss_kb'] / 1024:.1f} MB cold, "
+            f"{warm['maxrss_kb'] / 1024:.1f} MB after warm-up and requests."
+        ))
+
+    def _run(self, mode, urls):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, PHASE_MARK, mode, *urls],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Profiling run failed:\n{proc.stderr[-2000:]}")
+
+        imports = defaultdict(list)   # phase -> [(depth, module, cumulative us)]
+        phase = "interpreter"
+        for line in proc.stderr.splitlines():
+            if line.startswith(PHASE_MARK):
+                phase = line[len(PHASE_MARK):].strip()
+                continue
+            match = _IMPORT_RE.match(line)
+            if match:
+                depth = len(match[3]) // 2
+                imports[phase].append((depth, match[4], int(match[2])))
+        imports.pop("harness", None)
+        return json.loads(proc.stdout.strip().splitlines()[-1]), imports
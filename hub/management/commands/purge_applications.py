@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from hub.models import JobApplication
+from hub.retention import DEFAULT_BATCH_SIZE, DEFAULT_MAX_SECONDS, purge_applications, retention_days
+
+class Command(BaseCommand):
+    help = (
+        "Delete applications kept past APPLICATION_RETENTION_DAYS for their status, and their orphaned resume files. "
+        "Funnel rollups are kept but their status history goes, so a later rebuild_funnel counts fewer applications"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", action="append", default=[], metavar="STATUS=DAYS",
+                            help="Override the retention of one status (repeatable), e.g. REJECTED=180")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-seconds", type=int, default=DEFAULT_MAX_SECONDS,
+                            help="Start no new batch after this many seconds; the next run continues")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the applications that would be deleted")
+
+    def handle(self, *args, **options):
+        days_by_status = dict(retention_days())
+        statuses = dict(JobApplication.STATUS_CHOICES)
+        for value in options["status"]:
+            status, _, days = value.partition("=")
+            if status not in statuses or not days.isdigit():
+                raise CommandError(f"Expected STATUS=DAYS with a status in {', '.join(statuses)}, got {value!r}")
+            days_by_status[status] = int(days)
+        if not days_by_status:
+            raise CommandError("No retention configured: set APPLICATION_RETENTION_DAYS or pass --status.")
+
+        deleted, removed, finished = purge_applications(
+            days_by_status, batch_size=options["batch_size"],
+            max_seconds=options["max_seconds"], dry_run=options["dry_run"],
+        )
+        limits = ", ".join(f"{status} {days}d" for status, days in days_by_status.items())
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{deleted} applications are past retention ({limits})."))
+            return
+        message = f"Deleted {deleted} applications past retention ({limits}) and {removed} orphaned resume files."
+        if not finished:
+            message += " Time budget reached; the next run continues."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from hub.uploads import purge_stale
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads (and their partial files) that were never used"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24,
+                            help="Delete uploads started more than this many hours ago")
+
+    def handle(self, *args, **options):
+        count = purge_stale(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} stale chunked uploads."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from hub import applicant_summaries
+
+class Command(BaseCommand):
+    help = "Recompute the applicant summaries (sorting and filtering on company_job_applicants) from the Standard Apply sections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, action="append", dest="jobs",
+                            help="Only this job post (repeatable)")
+
+    def handle(self, *args, **options):
+        count = applicant_summaries.rebuild(options["jobs"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} applicant summaries."))
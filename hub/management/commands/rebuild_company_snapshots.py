@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from hub import snapshots
+from hub.models import CompanyProfile
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized company profile pages"
+
+    def handle(self, *args, **options):
+        count = 0
+        for company_id in CompanyProfile.objects.values_list("pk", flat=True).iterator():
+            snapshots.build(company_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} company snapshots."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from hub import funnel
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the hiring-funnel daily rollups from the application status log. "
+        "Applications deleted by purge_applications are no longer in the log, so their days are recounted without them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, action="append", dest="jobs",
+                            help="Only this job post (repeatable)")
+
+    def handle(self, *args, **options):
+        logged = funnel.backfill_log(options["jobs"])
+        rows = funnel.rebuild(options["jobs"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {logged} status log entries; rebuilt {rows} funnel rows."
+        ))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from hub.saved_searches import send_digests
+
+class Command(BaseCommand):
+    help = "Email students one digest of new listings matching their saved searches"
+
+    def handle(self, *args, **options):
+        checked, sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} saved searches, sent {sent} digests."))
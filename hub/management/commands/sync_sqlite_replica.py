@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto each SQLite read replica with the "
+        "online backup API. Use --interval to keep replicas in sync (local testing)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Repeat every N seconds instead of copying once")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("The primary database is not SQLite.")
+        targets = [
+            alias for alias in getattr(settings, "READ_REPLICAS", [])
+            if settings.DATABASES.get(alias, {}).get("ENGINE") == "django.db.backends.sqlite3"
+        ]
+        if not targets:
+            raise CommandError("No SQLite replicas configured in READ_REPLICAS.")
+
+        while True:
+            for alias in targets:
+                started = time.perf_counter()
+                self._copy(primary["NAME"], settings.DATABASES[alias]["NAME"])
+                self.stdout.write(f"Synced {alias} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def _copy(self, source_path, target_path):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            # Consistent snapshot; readers of the replica only block for the final page copy
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
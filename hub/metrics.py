@@ -0,0 +1,267 @@
+"""
+Prometheus metrics in text exposition format, aggregated across processes.
+
+Each worker process keeps its counters and histograms in memory (a dict
+update under a lock on the hot path) and, at most every FLUSH_INTERVAL
+seconds, writes a snapshot to ``METRICS_DIR/<pid>.json``. The /metrics view
+sums the snapshots of every process, so values survive worker restarts and
+stay correct behind a multi-process server. Clear METRICS_DIR on deploy.
+
+Domain gauges (active listings, pending moderation) are computed at scrape
+time and cached briefly.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail import get_connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+
+FLUSH_INTERVAL = 5.0
+DOMAIN_GAUGE_CACHE_SECONDS = 30
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'hub_http_requests_total': ('counter', 'HTTP requests by URL name, method and status.'),
+    'hub_http_request_duration_seconds': ('histogram', 'Request latency by URL name.'),
+    'hub_db_queries_total': ('counter', 'SQL statements executed.'),
+    'hub_cache_requests_total': ('counter', 'Cache get() calls by result (hit/miss).'),
+    'hub_outbound_email_sent_total': ('counter', 'Emails handed to the delivery backend, by result.'),
+    'hub_outbound_email_pending': ('gauge', 'Emails currently being delivered.'),
+    'hub_active_vacancies': ('gauge', 'Active, non-expired attachment vacancies.'),
+    'hub_active_job_posts': ('gauge', 'Active job posts.'),
+    'hub_pending_moderation_items': ('gauge', 'Items waiting for a moderator, by type.'),
+}
+
+
+class Registry:
+    """Per-process metric values. Keys are ``(name, ((label, value), ...))``."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def inc(self, name, labels=(), amount=1):
+        with self.lock:
+            self.counters[(name, labels)] += amount
+
+    def add_gauge(self, name, labels=(), amount=1):
+        with self.lock:
+            self.gauges[(name, labels)] += amount
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            hist = self.histograms.get((name, labels))
+            if hist is None:
+                # one slot per bucket, then +Inf, sum
+                hist = self.histograms[(name, labels)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[n, list(l), v] for (n, l), v in self.counters.items()],
+                'gauges': [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                'histograms': [[n, list(l), list(h)] for (n, l), h in self.histograms.items()],
+            }
+
+    def maybe_flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_flush < FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        directory = metrics_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f".{self.pid}.json.tmp"
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, directory / f"{self.pid}.json")
+
+
+_registry = Registry()
+
+
+def registry():
+    """This process's registry; a fresh one after fork so parent counts aren't doubled."""
+    global _registry
+    if _registry.pid != os.getpid():
+        _registry = Registry()
+    return _registry
+
+
+def metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / 'logs' / 'metrics'))
+
+
+def observe_request(url_name, method, status, seconds):
+    reg = registry()
+    url_name = url_name or 'unmatched'
+    reg.inc('hub_http_requests_total', (('url_name', url_name), ('method', method), ('status', str(status))))
+    reg.observe('hub_http_request_duration_seconds', (('url_name', url_name),), seconds)
+    reg.maybe_flush()
+
+
+def count_db_query():
+    registry().inc('hub_db_queries_total')
+
+
+def count_cache_get(hit):
+    registry().inc('hub_cache_requests_total', (('result', 'hit' if hit else 'miss'),))
+
+
+class MetricsEmailBackend(BaseEmailBackend):
+    """
+    Counts outbound email around the real backend named by
+    EMAIL_DELIVERY_BACKEND, so /metrics can report pending and sent mail.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.delivery = get_connection(
+            settings.EMAIL_DELIVERY_BACKEND, fail_silently=fail_silently, **kwargs
+        )
+
+    def open(self):
+        return self.delivery.open()
+
+    def close(self):
+        return self.delivery.close()
+
+    def send_messages(self, email_messages):
+        reg = registry()
+        pending = len(email_messages or [])
+        reg.add_gauge('hub_outbound_email_pending', amount=pending)
+        sent = 0
+        try:
+            sent = self.delivery.send_messages(email_messages) or 0
+            return sent
+        finally:
+            reg.add_gauge('hub_outbound_email_pending', amount=-pending)
+            reg.inc('hub_outbound_email_sent_total', (('result', 'sent'),), sent)
+            reg.inc('hub_outbound_email_sent_total', (('result', 'failed'),), pending - sent)
+            reg.maybe_flush()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def aggregate():
+    """Sum the snapshots of all processes (this one read live)."""
+    own = registry()
+    own.maybe_flush(force=True)
+    counters, gauges, histograms = defaultdict(float), defaultdict(float), {}
+    for path in metrics_dir().glob('*.json'):
+        try:
+            pid = int(path.stem)
+            data = json.loads(path.read_text())
+        except (ValueError, OSError):
+            continue
+        for name, labels, value in data['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        # Gauges describe live state; a dead worker's in-flight mail is gone
+        if pid == own.pid or _pid_alive(pid):
+            for name, labels, value in data['gauges']:
+                gauges[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, hist in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], hist)]
+            else:
+                histograms[key] = hist
+    return counters, gauges, histograms
+
+
+def domain_gauges():
+    values = cache.get('metrics:domain_gauges')
+    if values is None:
+        from .models import CompanyProfile, CompanyReview, JobPost, ListingFingerprint, Vacancy
+
+        today = timezone.now().date()
+        values = [
+            ('hub_active_vacancies', (), Vacancy.objects.filter(is_active=True, deadline__gte=today).count()),
+            ('hub_active_job_posts', (), JobPost.objects.filter(is_active=True).count()),
+            ('hub_pending_moderation_items', (('type', 'company'),),
+             CompanyProfile.objects.filter(admin_approved=False, email_verified=True).count()),
+            ('hub_pending_moderation_items', (('type', 'review'),),
+             CompanyReview.objects.filter(approved=False).count()),
+            ('hub_pending_moderation_items', (('type', 'duplicate'),),
+             ListingFingerprint.objects.filter(duplicate_of__isnull=False).count()),
+        ]
+        cache.set('metrics:domain_gauges', values, DOMAIN_GAUGE_CACHE_SECONDS)
+    return values
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_exposition():
+    counters, gauges, histograms = aggregate()
+    for name, labels, value in domain_gauges():
+        gauges[(name, labels)] += value
+
+    by_name = defaultdict(list)
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        by_name[name].append((labels, value))
+    for (name, labels), hist in histograms.items():
+        by_name[name].append((labels, hist))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            cumulative += value[len(LATENCY_BUCKETS)]
+            lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {value[-1]!r}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
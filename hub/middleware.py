@@ -0,0 +1,133 @@
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from . import metrics
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+from .instrumentation import RequestTiming, normalize_sql, timing_settings
+from .principal import principal_for
+
+slow_log = logging.getLogger('hub.slow')
+
+
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+def _user_role(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'ANONYMOUS'
+    return user.role
+
+
+@sync_and_async_middleware
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header (db, render, cache, total) to every response
+    and writes slow requests and slow SQL statements to the ``hub.slow`` log.
+
+    Only REQUEST_TIMING['SAMPLE_RATE'] of requests get the db/render/cache
+    breakdown and slow-query capture; total time is always measured, and
+    also recorded in the per-route /metrics histogram.
+    Put it first in MIDDLEWARE so "total" covers the other middleware.
+    Runs natively under ASGI, so the timing context stays on the request's task.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing, started = self._start()
+        token = timing.activate() if timing else None
+        try:
+            response = self.get_response(request)
+        finally:
+            if token:
+                RequestTiming.deactivate(token)
+        return self._finish(request, response, timing, started)
+
+    async def __acall__(self, request):
+        timing, started = self._start()
+        token = timing.activate() if timing else None
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token:
+                RequestTiming.deactivate(token)
+        return self._finish(request, response, timing, started)
+
+    def _start(self):
+        conf = timing_settings()
+        timing = None
+        if conf['SAMPLE_RATE'] >= 1 or random.random() < conf['SAMPLE_RATE']:
+            timing = RequestTiming(conf['SLOW_QUERY_MS'])
+        return timing, time.perf_counter()
+
+    def _finish(self, request, response, timing, started):
+        elapsed = time.perf_counter() - started
+        total_ms = elapsed * 1000
+        metrics.observe_request(_url_name(request), request.method, response.status_code, elapsed)
+
+        parts = []
+        if timing:
+            parts += [
+                f'db;dur={timing.db * 1000:.1f};desc="{timing.db_queries} queries"',
+                f'render;dur={timing.render * 1000:.1f}',
+                f'cache;dur={timing.cache * 1000:.1f}',
+            ]
+        parts.append(f'total;dur={total_ms:.1f}')
+        response['Server-Timing'] = ', '.join(parts)
+
+        if total_ms >= timing_settings()['SLOW_REQUEST_MS'] or (timing and timing.slow_queries):
+            self._log(request, response, total_ms, timing)
+        return response
+
+    def _log(self, request, response, total_ms, timing):
+        context = {
+            'url_name': _url_name(request),
+            'path': request.path,
+            'method': request.method,
+            'role': _user_role(request),
+        }
+        if total_ms >= timing_settings()['SLOW_REQUEST_MS']:
+            payload = dict(context, status=response.status_code, total_ms=round(total_ms, 1))
+            if timing:
+                payload.update(
+                    db_ms=round(timing.db * 1000, 1),
+                    db_queries=timing.db_queries,
+                    render_ms=round(timing.render * 1000, 1),
+                    cache_ms=round(timing.cache * 1000, 1),
+                    templates={name: round(s * 1000, 1) for name, s in timing.templates.items()},
+                )
+            slow_log.warning('slow_request', extra={'payload': payload})
+        if timing:
+            for sql, elapsed in timing.slow_queries:
+                slow_log.warning('slow_query', extra={'payload': dict(
+                    context, sql=normalize_sql(sql), ms=round(elapsed * 1000, 1),
+                )})
+
+
+@sync_and_async_middleware
+class PrincipalMiddleware:
+    """
+    Sets ``request.principal``: the cached role / company id / can_post of
+    request.user (see hub/principal.py). Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: principal_for(request.user))
+        return self.get_response(request)
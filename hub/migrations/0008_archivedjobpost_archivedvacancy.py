@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0007_savedsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJobPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('department', models.CharField(blank=True, max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('region', models.CharField(blank=True, max_length=255)),
+                ('work_location_type', models.CharField(choices=[('ONSITE', 'Onsite'), ('REMOTE', 'Remote'), ('HYBRID', 'Hybrid')], max_length=10)),
+                ('job_type', models.CharField(choices=[('FULL_TIME', 'Full-time'), ('PART_TIME', 'Part-time'), ('CONTRACT', 'Contract'), ('FREELANCE', 'Freelance'), ('INTERN', 'Internship')], max_length=12)),
+                ('experience_level', models.CharField(choices=[('ENTRY', 'Entry-Level'), ('MID', 'Mid-Level'), ('SENIOR', 'Senior'), ('EXEC', 'Executive')], max_length=6)),
+                ('salary_min', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('salary_max', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('currency', models.CharField(choices=[('KES', 'KES'), ('USD', 'USD'), ('EUR', 'EUR'), ('GBP', 'GBP')], max_length=3)),
+                ('responsibilities', models.TextField(blank=True)),
+                ('benefits', models.TextField(blank=True)),
+                ('application_deadline', models.DateField(blank=True, null=True)),
+                ('easy_apply', models.BooleanField(default=True)),
+                ('standard_apply', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('applications', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('application_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_job_posts', to='hub.companyprofile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedVacancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('department', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('duration', models.CharField(max_length=255)),
+                ('required_skills', models.TextField()),
+                ('requirements', models.TextField()),
+                ('application_method', models.CharField(max_length=255)),
+                ('application_link', models.URLField(blank=True)),
+                ('positions_available', models.PositiveIntegerField(default=1)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('region', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('deadline', models.DateField()),
+                ('is_verified_vacancy', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_vacancies', to='hub.companyprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Archived vacancies',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0009_companyprofile_logo_sha256_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyprofile',
+            name='county_code',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='companyprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='companyprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='county_code',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='county_code',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='companyprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='hub_company_latitud_cb8163_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['latitude', 'longitude'], name='hub_jobpost_latitud_27c39c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['latitude', 'longitude'], name='hub_vacancy_latitud_7f57f4_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:51
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0010_companyprofile_county_code_companyprofile_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanySnapshot',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='hub.companyprofile')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('stale', models.BooleanField(default=False)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
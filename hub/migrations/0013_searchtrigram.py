@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0012_applicationstatuschange_funneldaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('JOB', 'Job post'), ('COMPANY', 'Company')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('gram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'gram'], name='hub_searcht_kind_94ca61_idx')],
+                'unique_together': {('kind', 'object_id', 'gram')},
+            },
+        ),
+    ]
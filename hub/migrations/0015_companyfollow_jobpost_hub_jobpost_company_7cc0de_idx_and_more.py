@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0014_jobapplication_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyFollow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['company', 'created_at'], name='hub_jobpost_company_7cc0de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['company', 'created_at'], name='hub_vacancy_company_b4f7f2_idx'),
+        ),
+        migrations.AddField(
+            model_name='companyfollow',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='followers', to='hub.companyprofile'),
+        ),
+        migrations.AddField(
+            model_name='companyfollow',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='company_follows', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='companyfollow',
+            unique_together={('student', 'company')},
+        ),
+    ]
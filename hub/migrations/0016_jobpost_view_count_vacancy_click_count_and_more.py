@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0015_companyfollow_jobpost_hub_jobpost_company_7cc0de_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='click_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Clicks on application_link'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
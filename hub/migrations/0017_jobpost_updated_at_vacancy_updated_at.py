@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    for name in ('Vacancy', 'JobPost'):
+        apps.get_model('hub', name).objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0016_jobpost_view_count_vacancy_click_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
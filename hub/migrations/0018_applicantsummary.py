@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0017_jobpost_updated_at_vacancy_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicantSummary',
+            fields=[
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='hub.jobapplication')),
+                ('education_level', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Other'), (1, 'Certificate'), (2, 'Diploma'), (3, "Bachelor's degree"), (4, "Master's degree"), (5, 'Doctorate')], null=True)),
+                ('graduated', models.BooleanField(default=False)),
+                ('experience_months', models.PositiveIntegerField(default=0)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('eligible_to_work', models.BooleanField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applicant_summaries', to='hub.jobpost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', 'education_level'], name='hub_applica_job_id_4ad689_idx'), models.Index(fields=['job', 'experience_months'], name='hub_applica_job_id_fb7540_idx'), models.Index(fields=['job', 'start_date'], name='hub_applica_job_id_a25291_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def index_archived_applications(apps, schema_editor):
+    # Rebuild the rows from the serialized applications, which also covers
+    # job posts archived before ArchivedApplication existed
+    ArchivedJobPost = apps.get_model('hub', 'ArchivedJobPost')
+    ArchivedApplication = apps.get_model('hub', 'ArchivedApplication')
+    for job in ArchivedJobPost.objects.only('pk', 'applications').iterator(chunk_size=500):
+        ArchivedApplication.objects.filter(job_id=job.pk).delete()
+        rows = []
+        for snapshot in job.applications:
+            fields = snapshot[0]['fields']
+            created_at = fields['created_at']
+            rows.append(ArchivedApplication(
+                job_id=job.pk,
+                student_id=fields['student'],
+                status=fields['status'],
+                created_at=parse_datetime(created_at) if isinstance(created_at, str) else created_at,
+                resume_snapshot=fields.get('resume_snapshot') or '',
+            ))
+        ArchivedApplication.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0019_archivedapplication'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedapplication',
+            name='resume_snapshot',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(index_archived_applications, migrations.RunPython.noop),
+    ]
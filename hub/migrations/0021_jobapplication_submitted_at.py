@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:50
+
+from collections import Counter
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+
+def _bump(FunnelDaily, counts, sign):
+    for (job_id, day, status), n in counts.items():
+        updated = FunnelDaily.objects.filter(job_id=job_id, date=day, status=status).update(
+            entered=F('entered') + sign * n
+        )
+        if not updated and sign > 0:
+            FunnelDaily.objects.create(job_id=job_id, date=day, status=status, entered=n)
+
+
+def fill_funnel(apps, schema_editor):
+    JobApplication = apps.get_model('hub', 'JobApplication')
+    ApplicationPersonal = apps.get_model('hub', 'ApplicationPersonal')
+    ApplicationStatusChange = apps.get_model('hub', 'ApplicationStatusChange')
+    FunnelDaily = apps.get_model('hub', 'FunnelDaily')
+
+    # Standard Apply shells never submitted: nothing but the (job, student)
+    # row, on a job that offers Standard Apply, and never acted on
+    drafts = JobApplication.objects.filter(
+        ~Exists(ApplicationPersonal.objects.filter(application=OuterRef('pk'))),
+        job__standard_apply=True, status='APPLIED', cover_letter='', idempotency_key__isnull=True,
+    ).filter(Q(resume_snapshot='') | Q(resume_snapshot__isnull=True))
+    draft_ids = list(drafts.values_list('pk', flat=True))
+    JobApplication.objects.exclude(pk__in=draft_ids).update(submitted_at=F('created_at'))
+    JobApplication.objects.filter(pk__in=draft_ids).update(submitted_at=None)
+
+    # Their creation was counted as an application; take it back
+    logged = ApplicationStatusChange.objects.filter(application_id__in=draft_ids, from_status='')
+    _bump(FunnelDaily, Counter(
+        (job_id, timezone.localdate(changed_at), status)
+        for job_id, changed_at, status in logged.values_list('job_id', 'changed_at', 'to_status')
+    ), -1)
+    ApplicationStatusChange.objects.filter(application_id__in=draft_ids).delete()
+
+    # Applications from before the log (0012 created the rollups empty):
+    # log them as in funnel.backfill_log() and count them
+    unlogged = JobApplication.objects.filter(
+        ~Exists(ApplicationStatusChange.objects.filter(application=OuterRef('pk'))),
+        submitted_at__isnull=False,
+    )
+    changes, entered = [], Counter()
+    for pk, job_id, status, submitted_at in unlogged.values_list('pk', 'job_id', 'status', 'submitted_at').iterator():
+        day = timezone.localdate(submitted_at)
+        changes.append(ApplicationStatusChange(
+            application_id=pk, job_id=job_id, to_status='APPLIED', changed_at=submitted_at,
+        ))
+        entered[job_id, day, 'APPLIED'] += 1
+        if status != 'APPLIED':
+            changes.append(ApplicationStatusChange(
+                application_id=pk, job_id=job_id, from_status='APPLIED', to_status=status, changed_at=submitted_at,
+            ))
+            entered[job_id, day, status] += 1
+    ApplicationStatusChange.objects.bulk_create(changes, batch_size=1000)
+    _bump(FunnelDaily, entered, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0020_archivedapplication_resume_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.RunPython(fill_funnel, migrations.RunPython.noop),
+    ]
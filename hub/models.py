@@ -1,14 +1,20 @@
+import uuid
 from datetime import timedelta
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.urls import reverse
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
+from . import geo
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -28,6 +34,12 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == 'MODERATOR'
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Drop the cached User/principal used for per-request auth
+        from .principal import invalidate
+        invalidate([self.pk])
+
 class CompanyProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='company_profile')
     name = models.CharField(max_length=255)
@@ -44,6 +56,12 @@ class CompanyProfile(models.Model):
     phone_number = models.CharField(max_length=50, blank=True)
     website = models.URLField(blank=True)
     logo = models.ImageField(upload_to='logos/', blank=True, null=True)
+    logo_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+
+    # Filled from location/region by geo.apply() on save
+    county_code = models.CharField(max_length=3, blank=True, db_index=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
 
     email_verified = models.BooleanField(default=False)
     admin_approved = models.BooleanField(default=False)
@@ -54,6 +72,18 @@ class CompanyProfile(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
+    def save(self, *args, **kwargs):
+        geo.apply(self)
+        super().save(*args, **kwargs)
+        # can_post is cached in the owner's principal
+        from .principal import invalidate
+        invalidate([self.user_id])
+
     @property
     def can_post(self):
         return self.email_verified and self.admin_approved
@@ -76,6 +106,7 @@ class StudentProfile(models.Model):
     work_experience = models.TextField(blank=True, help_text="List roles, companies, dates, responsibilities.")
     default_cover_letter = models.TextField(blank=True)
     resume = models.FileField(upload_to=upload_cv_path, blank=True, null=True)
+    resume_sha256 = models.CharField(max_length=64, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -108,17 +139,29 @@ class Vacancy(models.Model):
         help_text="Region for this vacancy (if different from company HQ)."
     )
 
+    # Filled from location/region by geo.apply() on save
+    county_code = models.CharField(max_length=3, blank=True, db_index=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateField()
 
     is_verified_vacancy = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
+    # Buffered in memory and added in batches by hub/engagement.py
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    click_count = models.PositiveIntegerField(default=0, editable=False, help_text="Clicks on application_link")
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['deadline']),
             models.Index(fields=['title']),
+            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['company', 'created_at']),
         ]
 
     def __str__(self):
@@ -128,11 +171,13 @@ class Vacancy(models.Model):
         today = timezone.now().date()
         base_date = self.created_at.date() if self.created_at else today
 
-        if self.deadline < base_date:
-            raise ValidationError("Deadline cannot be in the past.")
+        # A missing or unparseable deadline is already reported against the field
+        if self.deadline is not None:
+            if self.deadline < base_date:
+                raise ValidationError("Deadline cannot be in the past.")
 
-        if self.deadline > base_date + timedelta(days=14):
-            raise ValidationError("Deadline cannot be more than 14 days from posting date.")
+            if self.deadline > base_date + timedelta(days=14):
+                raise ValidationError("Deadline cannot be more than 14 days from posting date.")
 
         if not self.company.can_post:
             raise ValidationError("Company is not verified/approved to post vacancies.")
@@ -146,6 +191,7 @@ class Vacancy(models.Model):
         self.full_clean()
         if self.deadline < timezone.now().date():
             self.is_active = False
+        geo.apply(self)
         super().save(*args, **kwargs)
 
     @property
@@ -191,6 +237,11 @@ class JobPost(models.Model):
     region = models.CharField(max_length=255, blank=True)
     work_location_type = models.CharField(max_length=10, choices=WORK_LOCATION_CHOICES, default='ONSITE')
 
+    # Filled from location/region by geo.apply() on save
+    county_code = models.CharField(max_length=3, blank=True, db_index=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+
     job_type = models.CharField(max_length=12, choices=JOB_TYPE_CHOICES, default='FULL_TIME')
     experience_level = models.CharField(max_length=6, choices=EXPERIENCE_LEVEL_CHOICES, default='ENTRY')
 
@@ -207,6 +258,10 @@ class JobPost(models.Model):
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Buffered in memory and added in batches by hub/engagement.py
+    view_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -214,10 +269,16 @@ class JobPost(models.Model):
             models.Index(fields=['title']),
             models.Index(fields=['experience_level']),
             models.Index(fields=['job_type']),
+            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['company', 'created_at']),
         ]
 
     def __str__(self):
         return f"{self.title} at {self.company.name}"
+
+    def save(self, *args, **kwargs):
+        geo.apply(self)
+        super().save(*args, **kwargs)
     
 class JobApplication(models.Model):
     STATUS_CHOICES = (
@@ -233,11 +294,18 @@ class JobApplication(models.Model):
     resume_snapshot = models.FileField(upload_to='app_resumes/', blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='APPLIED')
     created_at = models.DateTimeField(auto_now_add=True)
+    # None while a Standard Apply is a draft: job_apply_standard creates the
+    # application on GET so its sections have a parent
+    submitted_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
 
     # NEW — declarations
     certify_truth = models.BooleanField(default=False)
     agree_at_will = models.BooleanField(default=False)
 
+    # Key of the Easy Apply form submission that created this application;
+    # a retried submission carries the same key
+    idempotency_key = models.UUIDField(null=True, blank=True, editable=False)
+
     class Meta:
         unique_together = ('job','student')
         ordering = ['-created_at']
@@ -338,3 +406,325 @@ class CompanyReview(models.Model):
         if not qs.exists():
             return None
         return round(qs.aggregate(models.Avg('rating'))['rating__avg'], 1)
+
+
+class ListingFingerprint(models.Model):
+    """MinHash signature of a vacancy or job post, used to catch reposted clones."""
+    KIND_CHOICES = (
+        ('VACANCY', 'Attachment vacancy'),
+        ('JOB', 'Job post'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    company = models.ForeignKey(CompanyProfile, on_delete=models.CASCADE, related_name='listing_fingerprints')
+    title = models.CharField(max_length=255)
+    signature = models.BinaryField()
+
+    # Set when the listing was posted as a near-copy of an earlier one.
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
+    similarity = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.title}"
+
+    @staticmethod
+    def kind_for(listing):
+        return 'VACANCY' if isinstance(listing, Vacancy) else 'JOB'
+
+    def get_listing(self):
+        model = Vacancy if self.kind == 'VACANCY' else JobPost
+        return model.objects.filter(pk=self.object_id).first()
+
+    def listing_is_live(self):
+        if self.kind == 'VACANCY':
+            return Vacancy.objects.filter(
+                pk=self.object_id, is_active=True, deadline__gte=timezone.now().date()
+            ).exists()
+        return JobPost.objects.filter(pk=self.object_id, is_active=True).exists()
+
+
+class ListingBand(models.Model):
+    """One LSH bucket of a fingerprint; lookups go through the indexed key."""
+    fingerprint = models.ForeignKey(ListingFingerprint, on_delete=models.CASCADE, related_name='bands')
+    key = models.CharField(max_length=16, db_index=True)
+
+
+class SearchTrigram(models.Model):
+    """One trigram of a job post's title/department or of a company name; see hub/fuzzy.py."""
+    KIND_CHOICES = (
+        ('JOB', 'Job post'),
+        ('COMPANY', 'Company'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = ('kind', 'object_id', 'gram')
+        indexes = [models.Index(fields=['kind', 'gram'])]
+
+
+class SavedSearch(models.Model):
+    """A student's vacancy_list / job_list filter set, matched nightly against new listings."""
+    KIND_CHOICES = (
+        ('VACANCY', 'Attachment vacancies'),
+        ('JOB', 'Jobs'),
+    )
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_searches')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.student.username}: {self.label()}"
+
+    @property
+    def watermark(self):
+        return self.last_notified_at or self.created_at
+
+    def label(self):
+        filters = ", ".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.get_kind_display()}" + (f" ({filters})" if filters else "")
+
+    def get_absolute_url(self):
+        if self.kind == 'VACANCY':
+            return reverse('hub:vacancy_list') + '?' + urlencode(self.params)
+        return reverse('hub:job_list') + '?' + urlencode({'mode': 'jobs', **self.params})
+
+
+class CompanyFollow(models.Model):
+    """A student following a company; its new listings show in the student's feed (see hub/feed.py)."""
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='company_follows')
+    company = models.ForeignKey(CompanyProfile, on_delete=models.CASCADE, related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'company')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.student.username} follows {self.company.name}"
+
+
+class ArchivedVacancy(models.Model):
+    """
+    Cold copy of an expired/inactive Vacancy, moved out of the hot table by
+    the archive_listings command. Field names mirror Vacancy.
+    """
+    original_id = models.PositiveBigIntegerField(unique=True)
+    company = models.ForeignKey(CompanyProfile, on_delete=models.CASCADE, related_name='archived_vacancies')
+    title = models.CharField(max_length=255)
+    department = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    duration = models.CharField(max_length=255)
+    required_skills = models.TextField()
+    requirements = models.TextField()
+    application_method = models.CharField(max_length=255)
+    application_link = models.URLField(blank=True)
+    positions_available = models.PositiveIntegerField(default=1)
+    start_date = models.DateField(null=True, blank=True)
+    region = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    deadline = models.DateField()
+    is_verified_vacancy = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=False)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'Archived vacancies'
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedJobPost(models.Model):
+    """
+    Cold copy of a closed JobPost. Its applications and their form sections
+    are kept as serialized snapshots in ``applications``.
+    """
+    original_id = models.PositiveBigIntegerField(unique=True)
+    company = models.ForeignKey(CompanyProfile, on_delete=models.CASCADE, related_name='archived_job_posts')
+    title = models.CharField(max_length=255)
+    department = models.CharField(max_length=255, blank=True)
+    location = models.CharField(max_length=255)
+    region = models.CharField(max_length=255, blank=True)
+    work_location_type = models.CharField(max_length=10, choices=JobPost.WORK_LOCATION_CHOICES)
+    job_type = models.CharField(max_length=12, choices=JobPost.JOB_TYPE_CHOICES)
+    experience_level = models.CharField(max_length=6, choices=JobPost.EXPERIENCE_LEVEL_CHOICES)
+    salary_min = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    salary_max = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3, choices=JobPost.CURRENCIES)
+    responsibilities = models.TextField(blank=True)
+    benefits = models.TextField(blank=True)
+    application_deadline = models.DateField(null=True, blank=True)
+    easy_apply = models.BooleanField(default=True)
+    standard_apply = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    # One entry per application: the serialized JobApplication followed by its sections
+    applications = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    application_count = models.PositiveIntegerField(default=0)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedApplication(models.Model):
+    """
+    A student's application to a job post that was archived, so it stays on
+    their dashboard; the full application is in ArchivedJobPost.applications.
+    ``resume_snapshot`` is the CV file it still refers to, so purging other
+    applications can tell which files are in use without reading the JSON.
+    """
+    job = models.ForeignKey(ArchivedJobPost, on_delete=models.CASCADE, related_name='archived_applications')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_applications')
+    status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    resume_snapshot = models.CharField(max_length=255, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.student_id} -> {self.job} ({self.status})"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file being uploaded in pieces (see hub/uploads.py). The bytes live in
+    CHUNKED_UPLOAD_DIR until the form that uses the file is submitted.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chunked_uploads')
+    field = models.CharField(max_length=20)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+
+class CompanySnapshot(models.Model):
+    """Precomputed company_profile page; rebuilt by hub/snapshots.py when it goes stale."""
+    company = models.OneToOneField(CompanyProfile, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    stale = models.BooleanField(default=False)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.company_id}{' (stale)' if self.stale else ''}"
+
+
+class ApplicationStatusChange(models.Model):
+    """
+    One status transition of an application (``from_status`` is blank when it
+    was created). Source of truth for the funnel rollups in hub/funnel.py.
+    """
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='status_changes')
+    job = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    changed_at = models.DateTimeField(default=timezone.now)
+    # Time spent in from_status; unknown for history backfilled by rebuild_funnel
+    seconds_in_status = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            models.Index(fields=['application', 'changed_at']),
+            models.Index(fields=['job', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class FunnelDaily(models.Model):
+    """
+    Per job, day and status: applications that entered the status that day,
+    and those that left it with how long they had spent in it. Maintained
+    incrementally by hub/funnel.py.
+    """
+    job = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='funnel_days')
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    entered = models.PositiveIntegerField(default=0)
+    # Only exits with a known time in status
+    exited = models.PositiveIntegerField(default=0)
+    seconds_in_status = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'date', 'status')
+        indexes = [models.Index(fields=['date'])]
+
+    def __str__(self):
+        return f"{self.job_id} {self.date} {self.status}: +{self.entered} -{self.exited}"
+
+
+class ApplicantSummary(models.Model):
+    """
+    The structured Standard Apply answers company_job_applicants sorts and
+    filters on, recomputed by hub/applicant_summaries.py whenever the
+    application's sections are saved. Easy Apply applications have none.
+    """
+    EDUCATION_LEVELS = (
+        (0, 'Other'),
+        (1, 'Certificate'),
+        (2, 'Diploma'),
+        (3, "Bachelor's degree"),
+        (4, "Master's degree"),
+        (5, 'Doctorate'),
+    )
+    application = models.OneToOneField(JobApplication, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    # Copied from the application so the filters below use one index per job
+    job = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='applicant_summaries')
+    # Highest level among the education entries; null when none were given
+    education_level = models.PositiveSmallIntegerField(choices=EDUCATION_LEVELS, null=True, blank=True)
+    graduated = models.BooleanField(default=False)
+    # Overlapping jobs counted once; a job without an end date runs until the application
+    experience_months = models.PositiveIntegerField(default=0)
+    start_date = models.DateField(null=True, blank=True)
+    eligible_to_work = models.BooleanField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'education_level']),
+            models.Index(fields=['job', 'experience_months']),
+            models.Index(fields=['job', 'start_date']),
+        ]
+
+    @property
+    def experience_years(self):
+        return round(self.experience_months / 12, 1)
+
+    def __str__(self):
+        return f"Summary of application {self.application_id}"
@@ -0,0 +1,102 @@
+"""
+Cached identity for authorization checks.
+
+CachedModelBackend keeps the logged-in User row in the cache, and Principal
+is the small, cached summary the company/student checks need (role, company
+id, can_post). With a warm cache an authenticated request authorizes without
+touching the database; SESSION_ENGINE is cached_db for the same reason.
+
+Both are invalidated when the User or CompanyProfile is saved (see
+User.save / CompanyProfile.save and the admin bulk actions). Invalidation
+only reaches other workers through a shared cache (HUB_REDIS_URL); with the
+per-process LocMemCache the settings keep sessions in the database and
+PRINCIPAL_CACHE_SECONDS at a few seconds, the longest another worker may
+act on a stale entry.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+DEFAULT_CACHE_SECONDS = 300
+
+
+def _timeout():
+    return getattr(settings, 'PRINCIPAL_CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _principal_key(user_id):
+    return f"auth:principal:{user_id}"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int = None
+    role: str = None
+    company_id: int = None
+    can_post: bool = False
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_company(self):
+        return self.role == 'COMPANY'
+
+    @property
+    def is_student(self):
+        return self.role == 'STUDENT'
+
+
+ANONYMOUS = Principal()
+
+
+def principal_for(user):
+    if not user.is_authenticated:
+        return ANONYMOUS
+    key = _principal_key(user.pk)
+    principal = cache.get(key)
+    if principal is None:
+        from .models import CompanyProfile
+
+        company = None
+        if user.role == 'COMPANY':
+            company = (
+                CompanyProfile.objects.filter(user_id=user.pk)
+                .values('id', 'email_verified', 'admin_approved')
+                .first()
+            )
+        principal = Principal(
+            user_id=user.pk,
+            role=user.role,
+            company_id=company['id'] if company else None,
+            can_post=bool(company and company['email_verified'] and company['admin_approved']),
+        )
+        cache.set(key, principal, _timeout())
+    return principal
+
+
+def invalidate(user_ids):
+    keys = []
+    for user_id in user_ids:
+        keys += [_user_key(user_id), _principal_key(user_id)]
+    cache.delete_many(keys)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request get_user() is served from the cache."""
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, _timeout())
+        return user
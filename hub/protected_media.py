@@ -0,0 +1,149 @@
+"""
+Sending files that must not be public (CVs) after a permission check.
+
+The view decides who may see the file; serve_protected() then hands the
+transfer to the front-end server when PROTECTED_MEDIA_SERVER is set:
+
+* ``'nginx'``: ``X-Accel-Redirect`` to PROTECTED_MEDIA_INTERNAL_URL + name,
+  an ``internal`` location aliased to MEDIA_ROOT;
+* ``'sendfile'``: ``X-Sendfile`` with the absolute path (Apache
+  mod_xsendfile, lighttpd).
+
+Otherwise Django streams the file itself with FileResponse, honouring a
+single ``Range: bytes=`` request so PDF viewers and resumed downloads work.
+The protected prefixes must not be reachable under MEDIA_URL directly;
+serve_media(), the DEBUG media view, refuses any path that normalises into
+one of them.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import serve
+
+# Upload directories that are only served through serve_protected()
+PROTECTED_PREFIXES = ('cvs/', 'app_resumes/')
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_protected(name):
+    """Whether the media path ``name`` resolves into one of PROTECTED_PREFIXES."""
+    name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+    return any(name.startswith(prefix) or name == prefix.rstrip('/') for prefix in PROTECTED_PREFIXES)
+
+
+def serve_media(request, path, document_root=None):
+    """django.views.static.serve for DEBUG, refusing anything under the protected prefixes."""
+    if is_protected(path):
+        raise Http404("File not found.")
+    return serve(request, path, document_root=document_root)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single byte range, or None to send the
+    whole file (no header, or a multi-range request).
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or not (match[1] or match[2]):
+        return None
+    if match[1]:
+        start = int(match[1])
+        end = min(int(match[2]), size - 1) if match[2] else size - 1
+    else:
+        suffix = int(match[2])
+        if not suffix:
+            raise RangeNotSatisfiable
+        start, end = max(size - suffix, 0), size - 1
+    if start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class _FileSlice:
+    """Read-only view of ``length`` bytes of ``fileobj`` from its current position."""
+
+    def __init__(self, fileobj, length):
+        self.fileobj = fileobj
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+
+def _disposition(response, filename):
+    response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(filename)}"
+
+
+def serve_protected(request, fieldfile):
+    """Response sending ``fieldfile`` to a request that has already been authorized."""
+    try:
+        path = fieldfile.path
+        stat = os.stat(path)
+    except (ValueError, FileNotFoundError):
+        raise Http404("File not found.")
+    filename = os.path.basename(fieldfile.name)
+    server = getattr(settings, 'PROTECTED_MEDIA_SERVER', None)
+
+    if server in ('nginx', 'sendfile'):
+        response = HttpResponse(content_type=_content_type(filename))
+        if server == 'nginx':
+            internal = getattr(settings, 'PROTECTED_MEDIA_INTERNAL_URL', '/protected-media/')
+            response['X-Accel-Redirect'] = internal + quote(fieldfile.name)
+        else:
+            response['X-Sendfile'] = path
+        _disposition(response, filename)
+        response['Cache-Control'] = 'private'
+        return response
+
+    last_modified = http_date(stat.st_mtime)
+    requested = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if requested and if_range and parse_http_date_safe(if_range) != int(stat.st_mtime):
+        requested = None  # file changed since the client's partial copy
+
+    try:
+        span = byte_range(requested, stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    fileobj = open(path, 'rb')
+    if span is None:
+        response = FileResponse(fileobj, filename=filename)
+    else:
+        start, end = span
+        fileobj.seek(start)
+        response = FileResponse(
+            _FileSlice(fileobj, end - start + 1), status=206,
+            content_type=_content_type(filename), filename=filename,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    _disposition(response, filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = 'private'
+    return response
+
+
+def _content_type(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
@@ -0,0 +1,133 @@
+"""
+Retention of old job applications.
+
+APPLICATION_RETENTION_DAYS maps a status to how many days an application
+may sit in it (counted from its last status change, or from when it was
+made) before purge_applications deletes it; statuses it leaves out are kept
+indefinitely. Applications are deleted by primary key in batches, each in
+its own short transaction (a QuerySet.delete() of the batch, which removes
+the rows hanging off them with one ``application_id IN (...)`` DELETE per
+table), so writers only wait for a single batch.
+
+Once a batch is committed, the resume snapshots it referenced are deleted
+from storage unless another application, a student profile (Easy Apply
+copies the profile CV by name) or an archived application still refers to
+them: one ``IN (...)`` lookup per column for the whole batch.
+
+A run stops once it has used its time budget, also part-way through a
+batch's files; the next run carries on with the applications, and any files
+it did not get to are logged so they can be removed by hand.
+
+The funnel rollups (FunnelDaily) are aggregates and are kept, but the
+status log they are computed from (ApplicationStatusChange) is deleted with
+the applications. A later rebuild_funnel therefore recounts only the
+applications that remain, and the history of purged days shrinks; rebuild
+only the jobs (``--job``) whose rollups are actually wrong.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import ApplicationStatusChange, ArchivedApplication, JobApplication, StudentProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = {'REJECTED': 365, 'HIRED': 730}
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_SECONDS = 300
+# Between batches, so queued writers get the database
+PAUSE_SECONDS = 0.05
+
+
+def retention_days():
+    return getattr(settings, 'APPLICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def expired_applications(days_by_status):
+    """Applications that have been in their status for longer than ``days_by_status`` allows."""
+    now = timezone.now()
+    expired = Q(pk__in=[])
+    for status, days in days_by_status.items():
+        cutoff = now - timedelta(days=days)
+        recent = ApplicationStatusChange.objects.filter(application=OuterRef('pk'), changed_at__gte=cutoff)
+        expired |= Q(status=status, created_at__lt=cutoff) & ~Exists(recent)
+    return JobApplication.objects.filter(expired)
+
+
+def _delete_batch(ids):
+    """Delete the applications ``ids`` and everything under them; returns their resume file names."""
+    applications = JobApplication.objects.filter(pk__in=ids)
+    files = set(
+        applications.exclude(resume_snapshot='').exclude(resume_snapshot=None)
+        .values_list('resume_snapshot', flat=True)
+    )
+    applications.delete()
+    return files
+
+
+def _in_use(names):
+    """The files in ``names`` an application, profile or archived application still refers to."""
+    names = list(names)
+    return (
+        set(JobApplication.objects.filter(resume_snapshot__in=names).values_list('resume_snapshot', flat=True))
+        | set(StudentProfile.objects.filter(resume__in=names).values_list('resume', flat=True))
+        | set(ArchivedApplication.objects.filter(resume_snapshot__in=names).values_list('resume_snapshot', flat=True))
+    )
+
+
+def remove_orphaned_files(names, deadline=None):
+    """
+    Delete the files in ``names`` nothing refers to any more, stopping at the
+    ``time.monotonic()`` ``deadline`` if one is given. Returns ``(files removed,
+    orphaned files left in place)``.
+    """
+    orphans = sorted(set(names) - _in_use(names))
+    removed = 0
+    for index, name in enumerate(orphans):
+        if deadline is not None and time.monotonic() >= deadline:
+            return removed, orphans[index:]
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.exception("Could not delete orphaned resume %s", name)
+            continue
+        removed += 1
+    return removed, []
+
+
+def purge_applications(days_by_status=None, batch_size=DEFAULT_BATCH_SIZE,
+                       max_seconds=DEFAULT_MAX_SECONDS, dry_run=False):
+    """
+    Delete expired applications until none are left or ``max_seconds`` have
+    passed. Returns ``(applications deleted, files removed, finished)``,
+    where ``finished`` is False when the budget ran out first. With
+    ``dry_run`` nothing is deleted and the expired applications are counted.
+    """
+    days_by_status = retention_days() if days_by_status is None else days_by_status
+    queryset = expired_applications(days_by_status)
+    if dry_run:
+        return queryset.count(), 0, True
+
+    deadline = time.monotonic() + max_seconds
+    deleted = removed = 0
+    while time.monotonic() < deadline:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted, removed, True
+        with transaction.atomic():
+            files = _delete_batch(ids)
+        deleted += len(ids)
+        batch_removed, left = remove_orphaned_files(files, deadline)
+        removed += batch_removed
+        if left:
+            logger.warning("Time budget reached; %d orphaned resume files were not removed: %s",
+                           len(left), ', '.join(left))
+            break
+        time.sleep(PAUSE_SECONDS)
+    return deleted, removed, not queryset.exists()
@@ -0,0 +1,249 @@
+"""
+Saved searches and the batched new-listing digest.
+
+All saved searches are loaded once and put into an in-memory inverted index
+keyed by a value every matching listing must carry (a trigram of the search
+text, a trigram of the company filter, or an exact filter value). Each new
+listing looks up its own keys, and only the searches found there are checked
+in full, so the run never issues a query per saved search.
+
+A search's watermark only moves up to the newest listing the run actually
+matched, and not at all when its student's digest could not be sent, so a
+mail failure or a listing created while the run is in progress is picked up
+by the next run.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.urls import reverse
+from django.utils import timezone
+
+from . import geo
+from .models import JobPost, SavedSearch, Vacancy
+
+logger = logging.getLogger(__name__)
+
+# GET parameters that make up a search, per listing kind (see vacancy_list / job_list).
+SEARCH_PARAMS = {
+    'VACANCY': ('q', 'company', 'verified', 'county', 'near', 'km'),
+    'JOB': ('q', 'company', 'exp', 'type', 'remote', 'smin', 'smax', 'county', 'near', 'km'),
+}
+
+
+def clean_params(kind, data):
+    """Keep only the non-empty filter values relevant to ``kind``."""
+    params = {}
+    for name in SEARCH_PARAMS[kind]:
+        value = (data.get(name) or '').strip()
+        if value:
+            params[name] = value
+    # The radius only means something around a place
+    if 'near' not in params:
+        params.pop('km', None)
+    return params
+
+
+def _trigrams(text):
+    text = (text or '').lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _search_fields(listing):
+    if isinstance(listing, Vacancy):
+        return (listing.title, listing.department, listing.location,
+                listing.region, listing.required_skills)
+    return (listing.title, listing.department)
+
+
+def _index_key(search):
+    """The single most selective key a matching listing is guaranteed to have."""
+    params = search.params
+    q = params.get('q', '').lower()
+    if len(q) >= 3:
+        return ('q', q[:3])
+    company = params.get('company', '').lower()
+    if len(company) >= 3:
+        return ('company', company[:3])
+    if search.kind == 'JOB':
+        for name in ('exp', 'type'):
+            if params.get(name):
+                return (name, params[name])
+    return ('all', search.kind)
+
+
+def _listing_keys(kind, listing):
+    keys = {('all', kind)}
+    for field in _search_fields(listing):
+        keys.update(('q', t) for t in _trigrams(field))
+    keys.update(('company', t) for t in _trigrams(listing.company.name))
+    if kind == 'JOB':
+        keys.add(('exp', listing.experience_level))
+        keys.add(('type', listing.job_type))
+    return keys
+
+
+def _decimal(value):
+    try:
+        return Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _place(near):
+    return geo.lookup(near)
+
+
+def _matches_geo(params, listing):
+    """views._geo_filter in Python: an unknown county or place filters nothing, as on the page."""
+    county = params.get('county', '')
+    if county in geo.counties() and listing.county_code != county:
+        return False
+    place = _place(params['near']) if params.get('near') else None
+    if place is not None:
+        if listing.latitude is None or listing.longitude is None:
+            return False
+        if geo.km_between(place, listing.latitude, listing.longitude) > geo.parse_radius(params.get('km')):
+            return False
+    return True
+
+
+def matches(search, listing):
+    """Python equivalent of the filters applied by vacancy_list / job_list."""
+    params = search.params
+    q = params.get('q', '').lower()
+    if q and not any(q in (f or '').lower() for f in _search_fields(listing)):
+        return False
+    company = params.get('company', '').lower()
+    if company and company not in listing.company.name.lower():
+        return False
+    if not _matches_geo(params, listing):
+        return False
+
+    if search.kind == 'VACANCY':
+        if params.get('verified') == '1' and not listing.company.is_verified_company:
+            return False
+        return True
+
+    if params.get('exp') and listing.experience_level != params['exp']:
+        return False
+    if params.get('type') and listing.job_type != params['type']:
+        return False
+    if params.get('remote') == '1' and listing.work_location_type != 'REMOTE':
+        return False
+    smin = _decimal(params.get('smin'))
+    if smin is not None and (listing.salary_min is None or listing.salary_min < smin):
+        return False
+    smax = _decimal(params.get('smax'))
+    if smax is not None and listing.salary_max is not None and listing.salary_max > smax:
+        return False
+    return True
+
+
+def build_index(searches):
+    index = defaultdict(list)
+    for search in searches:
+        index[_index_key(search)].append(search)
+    return index
+
+
+def new_listings(since):
+    today = timezone.now().date()
+    vacancies = (
+        Vacancy.objects.select_related('company')
+        .filter(is_active=True, deadline__gte=today, created_at__gt=since)
+    )
+    jobs = JobPost.objects.select_related('company').filter(is_active=True, created_at__gt=since)
+    return [('VACANCY', v) for v in vacancies] + [('JOB', j) for j in jobs]
+
+
+def collect_matches(searches, listings):
+    """Return ``{student: {search: [listing, ...]}}`` for one batch of listings."""
+    index = build_index(searches)
+    found = defaultdict(lambda: defaultdict(list))
+    for kind, listing in listings:
+        seen = set()
+        for key in _listing_keys(kind, listing):
+            for search in index.get(key, ()):
+                if search.pk in seen or search.kind != kind:
+                    continue
+                seen.add(search.pk)
+                if listing.created_at > search.watermark and matches(search, listing):
+                    found[search.student][search].append(listing)
+    return found
+
+
+def _listing_url(kind, listing):
+    name = 'hub:vacancy_detail' if kind == 'VACANCY' else 'hub:job_detail'
+    return settings.SITE_URL.rstrip('/') + reverse(name, args=[listing.pk])
+
+
+def _digest_message(student, per_search):
+    lines = [f"Hello {student.username},", "", "New listings matching your saved searches:", ""]
+    for search, listings in per_search.items():
+        lines.append(f"{search.label()} ({len(listings)} new)")
+        kind = search.kind
+        for listing in listings:
+            lines.append(f"  - {listing.title} at {listing.company.name}: {_listing_url(kind, listing)}")
+        lines.append("")
+    return EmailMessage(
+        subject="New listings for your saved searches",
+        body="\n".join(lines),
+        to=[student.email],
+    )
+
+
+def _send(messages):
+    """Send ``{student: message}`` over one connection; returns the students whose message went out."""
+    delivered = set()
+    if not messages:
+        return delivered
+    connection = get_connection()
+    try:
+        connection.open()
+        for student, message in messages.items():
+            try:
+                if connection.send_messages([message]):
+                    delivered.add(student)
+            except Exception:
+                logger.exception("Could not send the saved-search digest to %s", student.email)
+    except Exception:
+        logger.exception("Could not open a mail connection for saved-search digests")
+    finally:
+        connection.close()
+    return delivered
+
+
+def send_digests():
+    """
+    Match every listing created since the oldest watermark against all saved
+    searches and send one email per student over a single mail connection.
+    Returns ``(searches_checked, emails_sent)``.
+    """
+    searches = list(SavedSearch.objects.select_related('student'))
+    if not searches:
+        return 0, 0
+    since = min(s.watermark for s in searches)
+
+    listings = new_listings(since)
+    if not listings:
+        return len(searches), 0
+    newest = max(listing.created_at for _, listing in listings)
+
+    found = collect_matches(searches, listings)
+    messages = {
+        student: _digest_message(student, per_search)
+        for student, per_search in found.items()
+        if student.email
+    }
+    delivered = _send(messages)
+
+    # Students whose digest failed keep their watermark and get it next run
+    failed = {student.pk for student in messages if student not in delivered}
+    advanced = [s.pk for s in searches if s.student_id not in failed and s.watermark < newest]
+    SavedSearch.objects.filter(pk__in=advanced).update(last_notified_at=newest)
+    return len(searches), len(delivered)
@@ -0,0 +1,147 @@
+"""
+sitemap.xml and Atom/RSS feeds of the live listings, for crawlers.
+
+The sitemap index lists one page per PAGE_SIZE-wide primary-key range of
+live vacancies, job posts and approved companies, with the newest lastmod
+in that range; it comes from one grouped query per section. A page streams
+``(pk, lastmod)`` rows from ``.iterator()`` over a pk range, so neither
+needs COUNT or OFFSET, and rows are never loaded as model instances.
+Listing lastmod is ``updated_at``; a company page's is when its snapshot
+was last rebuilt (hub/snapshots.py), since that is when what it shows last
+changed.
+
+The feeds carry the FEED_ITEMS newest listings (feed.fetch() over every
+company).
+
+Every document is cached under a version that snapshots.mark_stale() bumps
+(it runs for every change to a company or its listings, including the bulk
+update() paths), and under today's date so expired vacancies drop out. A
+sitemap page streams while it is generated, and is kept once complete.
+The version only reaches other workers through a shared cache, so without
+HUB_REDIS_URL SITEMAP_CACHE_SECONDS is kept short.
+"""
+import datetime
+from hashlib import sha1
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+
+from . import feed
+from .models import CompanyProfile, JobPost, Vacancy
+
+PAGE_SIZE = 10000
+FEED_ITEMS = 50
+CHUNK = 1000
+DEFAULT_CACHE_SECONDS = 6 * 3600
+
+SECTIONS = ('vacancies', 'jobs', 'companies')
+FEED_FORMATS = {
+    'atom': feedgenerator.Atom1Feed,
+    'rss': feedgenerator.Rss201rev2Feed,
+}
+
+_VERSION_KEY = 'sitemaps:version'
+_PK_PLACEHOLDER = 999999999
+
+
+def _timeout():
+    return getattr(settings, 'SITEMAP_CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+
+
+def listings_changed():
+    """Invalidate every cached sitemap and feed."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 1, None)
+
+
+def cache_key(base_url, name):
+    version = cache.get(_VERSION_KEY, 0)
+    site = sha1(base_url.encode()).hexdigest()[:12]
+    return f"sitemaps:{version}:{timezone.localdate():%Y%m%d}:{site}:{name}"
+
+
+def _live(section):
+    """``(rows, URL name)``: the section's public rows, annotated with ``lastmod``."""
+    if section == 'vacancies':
+        rows = Vacancy.objects.filter(is_active=True, deadline__gte=timezone.localdate())
+        return rows.annotate(lastmod=F('updated_at')), 'hub:vacancy_detail'
+    if section == 'jobs':
+        return JobPost.objects.filter(is_active=True).annotate(lastmod=F('updated_at')), 'hub:job_detail'
+    rows = CompanyProfile.objects.filter(email_verified=True, admin_approved=True)
+    return rows.annotate(lastmod=Coalesce('snapshot__built_at', 'created_at')), 'hub:company_profile'
+
+
+def _w3c(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+def index_pages():
+    """``[(section, page, lastmod)]`` for the non-empty sitemap pages."""
+    pages = []
+    for section in SECTIONS:
+        rows, _ = _live(section)
+        buckets = (
+            rows.annotate(bucket=F('pk') / PAGE_SIZE)
+            .values_list('bucket').annotate(last=Max('lastmod')).order_by('bucket')
+        )
+        pages += [(section, bucket + 1, last) for bucket, last in buckets]
+    return pages
+
+
+def render_index(base_url):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for section, page, lastmod in index_pages():
+        loc = base_url + reverse('hub:sitemap_section', kwargs={'section': section, 'page': page})
+        yield f"<sitemap><loc>{escape(loc)}</loc><lastmod>{_w3c(lastmod)}</lastmod></sitemap>\n"
+    yield '</sitemapindex>\n'
+
+
+def render_section(base_url, section, page):
+    """The urlset for sitemap ``page`` (1-based) of ``section``, in chunks."""
+    rows, url_name = _live(section)
+    start = (page - 1) * PAGE_SIZE
+    rows = rows.filter(pk__gte=start, pk__lt=start + PAGE_SIZE).order_by('pk').values_list('pk', 'lastmod')
+    # reverse() once; only the pk differs between URLs
+    template = escape(base_url + reverse(url_name, args=[_PK_PLACEHOLDER])).replace(str(_PK_PLACEHOLDER), '{}')
+
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    chunk = []
+    for pk, lastmod in rows.iterator(chunk_size=CHUNK):
+        chunk.append(f"<url><loc>{template.format(pk)}</loc><lastmod>{_w3c(lastmod)}</lastmod></url>\n")
+        if len(chunk) >= CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + '</urlset>\n'
+
+
+def render_feed(base_url, fmt):
+    entries = feed.fetch(None, limit=FEED_ITEMS)
+    generator = FEED_FORMATS[fmt](
+        title="AttachmentTestimonyHub: new attachments and jobs",
+        link=base_url + reverse('hub:home'),
+        description="The newest attachment vacancies and job posts from verified companies.",
+        feed_url=base_url + reverse(f'hub:listings_feed_{fmt}'),
+        language='en',
+    )
+    for entry in entries:
+        link = base_url + entry.get_absolute_url()
+        generator.add_item(
+            title=entry.title,
+            link=link,
+            unique_id=link,
+            description=f"{entry.get_kind_display()} at {entry.company_name}, {entry.location}",
+            author_name=entry.company_name,
+            categories=[entry.get_kind_display()],
+            pubdate=entry.created_at,
+            updateddate=entry.created_at,
+        )
+    return generator.writeString('utf-8'), generator.content_type
@@ -0,0 +1,198 @@
+"""
+Materialized company profile pages.
+
+CompanySnapshot holds everything company_profile renders: the company header,
+active attachment and job summaries (badges and salary text precomputed),
+the average rating and the latest review excerpts. The page is then a single
+primary-key lookup.
+
+Saving or deleting a company's vacancy, job post or review, or the company
+itself (signals connected in HubConfig.ready), and the bulk update() paths
+that skip signals, call mark_stale(). After the transaction commits the
+snapshot is flagged stale and its company id queued for a background thread
+in this process, which rebuilds it. A snapshot that is missing or still stale
+when requested (e.g. the change came from a management command that exited)
+is rebuilt inline, always from the primary even when the request reads from
+a replica.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import Avg, Count, Q
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import sitemaps
+from .models import CompanyProfile, CompanySnapshot
+from .templatetags.salary_filters import salary_display
+
+logger = logging.getLogger(__name__)
+
+REVIEW_EXCERPTS = 6
+# Wait this long after a change so a burst of edits rebuilds once
+DEBOUNCE_SECONDS = 0.5
+MAX_BATCH = 100
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _company_data(company):
+    return {
+        'id': company.pk,
+        'name': company.name,
+        'location': company.location,
+        'region': company.region,
+        'website': company.website,
+        'official_email': company.official_email,
+        'map_embed_url': company.map_embed_url,
+        'is_verified_company': company.is_verified_company,
+        'admin_approved': company.admin_approved,
+    }
+
+
+def build(company_id):
+    """Recompute and store the snapshot; returns it, or None if the company is gone."""
+    # Read from where the snapshot is written: a lagging replica (the
+    # company_profile request may be routed to one) would be stored as fresh
+    db = router.db_for_write(CompanySnapshot)
+    company = CompanyProfile.objects.using(db).filter(pk=company_id).first()
+    if company is None:
+        return None
+    today = timezone.now().date()
+
+    attachments = []
+    for vacancy in company.vacancies.using(db).filter(is_active=True, deadline__gte=today):
+        vacancy.company = company
+        attachments.append({
+            'pk': vacancy.pk,
+            'title': vacancy.title,
+            'department': vacancy.department,
+            'location': vacancy.location,
+            'region': vacancy.region,
+            'deadline': vacancy.deadline,
+            'required_skills': vacancy.required_skills[:200],
+            'verification_badge': vacancy.verification_badge,
+        })
+
+    jobs = [
+        {
+            'pk': job.pk,
+            'title': job.title,
+            'location': job.location,
+            'region': job.region,
+            'work_location': job.get_work_location_type_display(),
+            'experience_level': job.get_experience_level_display(),
+            'salary': salary_display(job) if job.salary_min or job.salary_max else '',
+            'responsibilities': job.responsibilities[:200],
+            'easy_apply': job.easy_apply,
+        }
+        for job in company.job_posts.using(db).filter(is_active=True)
+    ]
+
+    rating = company.reviews.using(db).aggregate(
+        avg=Avg('rating', filter=Q(approved=True)), count=Count('pk', filter=Q(approved=True))
+    )
+    reviews = [
+        {'name': r.name, 'rating': r.rating, 'comment': r.comment, 'created_at': r.created_at}
+        for r in company.reviews.using(db).filter(approved=True)[:REVIEW_EXCERPTS]
+    ]
+
+    data = {
+        'company': _company_data(company),
+        'attachments': attachments,
+        'jobs': jobs,
+        'avg_rating': round(rating['avg'], 1) if rating['count'] else None,
+        'review_count': rating['count'],
+        'reviews': reviews,
+    }
+    snapshot, _ = CompanySnapshot.objects.using(db).update_or_create(
+        company=company, defaults={'data': data, 'stale': False}
+    )
+    return snapshot
+
+
+def profile_context(company_id, tab):
+    """Template context for company_profile, from the snapshot."""
+    snapshot = CompanySnapshot.objects.filter(company_id=company_id).first()
+    if snapshot is None or snapshot.stale:
+        snapshot = build(company_id)
+        if snapshot is None:
+            raise Http404("No CompanyProfile matches the given query.")
+        # As stored: dates come back from the JSON column as strings
+        snapshot.refresh_from_db(using=snapshot._state.db, fields=['data'])
+    data = snapshot.data
+    today = timezone.now().date()
+
+    attachments = []
+    for vacancy in data['attachments']:
+        deadline = parse_date(vacancy['deadline'])
+        # Deadlines pass without any write; drop those here instead of rebuilding
+        if deadline >= today:
+            attachments.append(dict(vacancy, deadline=deadline))
+    reviews = [dict(r, created_at=parse_datetime(r['created_at'])) for r in data['reviews']]
+
+    return {
+        'company': data['company'],
+        'tab': tab,
+        'attachments': attachments,
+        'jobs': data['jobs'],
+        'avg_rating': data['avg_rating'],
+        'reviews': reviews,
+    }
+
+
+def mark_stale(company_ids):
+    """
+    Flag these companies' snapshots and rebuild them once the current
+    transaction commits. The cached sitemaps and feeds are dropped too.
+    """
+    company_ids = {pk for pk in company_ids if pk is not None}
+    if company_ids:
+        transaction.on_commit(lambda: _flush(company_ids))
+
+
+def _flush(company_ids):
+    sitemaps.listings_changed()
+    CompanySnapshot.objects.filter(company_id__in=company_ids, stale=False).update(stale=True)
+    if getattr(settings, 'COMPANY_SNAPSHOT_ASYNC', True):
+        _start_worker()
+        for pk in company_ids:
+            _queue.put(pk)
+    else:
+        for pk in company_ids:
+            build(pk)
+
+
+def _start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='company-snapshots', daemon=True)
+            _worker.start()
+
+
+def _work():
+    while True:
+        pending = {_queue.get()}
+        try:
+            while len(pending) < MAX_BATCH:
+                pending.add(_queue.get(timeout=DEBOUNCE_SECONDS))
+        except queue.Empty:
+            pass
+        for pk in pending:
+            try:
+                build(pk)
+            except Exception:
+                logger.exception("Rebuilding the snapshot of company %s failed", pk)
+        close_old_connections()
+
+
+def on_change(sender, instance, **kwargs):
+    """post_save / post_delete receiver for CompanyProfile and its listings and reviews."""
+    mark_stale([instance.pk if isinstance(instance, CompanyProfile) else instance.company_id])
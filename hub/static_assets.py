@@ -0,0 +1,90 @@
+"""
+Static asset pipeline: content-hashed names, precompressed siblings and
+far-future caching.
+
+``collectstatic`` (through CompressedManifestStaticFilesStorage) writes every
+file under a content-hashed name, then a ``.gz`` sibling and, when the optional
+``brotli`` package is installed, a ``.br`` sibling for text assets. Templates
+pick up the hashed names through ``{% static %}`` automatically.
+
+serve_static() is for deployments where Django itself serves STATIC_ROOT; a
+front-end server should instead serve the same files with ``gzip_static`` /
+``brotli_static`` and the same Cache-Control headers.
+"""
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.cache import patch_vary_headers
+from django.views import static
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.xml', '.map')
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+# ManifestStaticFilesStorage inserts the first 12 hex digits of the MD5.
+_HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESS_EXTENSIONS):
+                self._compress(name)
+
+    def _compress(self, name):
+        path = Path(self.path(name))
+        if not path.exists():
+            return
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        # mtime=0 keeps the .gz output identical across collectstatic runs
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            path.with_name(path.name + '.gz').write_bytes(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                path.with_name(path.name + '.br').write_bytes(compressed)
+
+
+def is_hashed_name(path):
+    return bool(_HASHED_NAME_RE.search(path))
+
+
+def serve_static(request, path):
+    """
+    Serve a collected static file, preferring a precompressed sibling the
+    client accepts. Hashed names never change content, so they are cached
+    for a year; anything else must be revalidated.
+    """
+    root = Path(settings.STATIC_ROOT)
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    served = path
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in accept and (root / (path + suffix)).is_file():
+            served = path + suffix
+            break
+
+    # static.serve() derives Content-Type/Content-Encoding from the .gz/.br name
+    response = static.serve(request, served, document_root=root)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed_name(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
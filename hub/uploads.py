@@ -0,0 +1,238 @@
+"""
+Size- and type-capped uploads for CVs (``resume``) and company logos (``logo``).
+
+LimitedUploadHandler runs first in FILE_UPLOAD_HANDLERS. For the fields in
+UPLOAD_MAX_BYTES it sniffs the first chunk against ALLOWED_TYPES, counts bytes
+as they stream in and stops reading the request (StopUpload with
+connection_reset) as soon as a file is the wrong type or over its cap, so an
+oversized "CV" costs one chunk instead of the whole body. The violation is
+recorded in ``request.upload_errors`` for report_errors() to put on the form,
+and the SHA-256 of every accepted file in ``request.upload_hashes``.
+
+Large CVs can also be sent in pieces (ChunkedUpload, see the chunked_upload_*
+views): each PUT appends at ``Upload-Offset``, a client that lost its
+connection asks for the current offset and carries on, and the finished file
+is then submitted with the profile form by its upload id.
+"""
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.utils import timezone
+
+DEFAULT_MAX_BYTES = {
+    'resume': 10 * 1024 * 1024,
+    'logo': 2 * 1024 * 1024,
+}
+
+ALLOWED_TYPES = {
+    'resume': {
+        'application/pdf',
+        'application/msword',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    },
+    'logo': {'image/png', 'image/jpeg', 'image/gif', 'image/webp'},
+}
+
+TYPE_LABELS = {
+    'resume': 'PDF or Word',
+    'logo': 'PNG, JPEG, GIF or WebP',
+}
+
+# Largest body accepted by one chunked-upload PUT
+CHUNK_MAX_BYTES = 4 * 1024 * 1024
+HASH_BLOCK = 64 * 1024
+
+
+def max_bytes():
+    return {**DEFAULT_MAX_BYTES, **getattr(settings, 'UPLOAD_MAX_BYTES', {})}
+
+
+def sniff(head):
+    """Content type from the file's leading bytes, or None if unrecognised."""
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return 'application/msword'
+    if head.startswith(b'PK\x03\x04'):
+        return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def type_error(field_name, head):
+    """Error message when ``head`` is not an allowed type for the field, else None."""
+    if sniff(head) in ALLOWED_TYPES[field_name]:
+        return None
+    return f"Upload a {TYPE_LABELS[field_name]} file."
+
+
+def size_error(field_name):
+    return f"File is too large (maximum {max_bytes()[field_name] // (1024 * 1024)} MB)."
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Enforces max_bytes() / ALLOWED_TYPES per form field while the upload
+    streams, and hashes accepted files. Passes every chunk on unchanged, so
+    the memory/temporary-file handlers after it still build the file.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_length = content_length
+        self.request.upload_errors = {}
+        self.request.upload_hashes = {}
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+        self.limit = max_bytes().get(field_name)
+        if self.limit is None:
+            return
+        self.received = 0
+        self.sha256 = hashlib.sha256()
+        # The rest of the form is capped by DATA_UPLOAD_MAX_MEMORY_SIZE, so a
+        # bigger body cannot fit under this file's limit: refuse before reading it.
+        too_large = self.request_length > self.limit + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if too_large or (content_length or 0) > self.limit:
+            self._abort(size_error(field_name))
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limit is None:
+            return raw_data
+        if start == 0:
+            error = type_error(self.field_name, raw_data)
+            if error:
+                self._abort(error)
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self._abort(size_error(self.field_name))
+        self.sha256.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.limit is not None:
+            self.request.upload_hashes[self.field_name] = self.sha256.hexdigest()
+        # Let the next handler return the file
+        return None
+
+    def _abort(self, message):
+        self.request.upload_errors[self.field_name] = message
+        raise StopUpload(connection_reset=True)
+
+
+def report_errors(request, form):
+    """Add the upload handler's errors for this request to ``form``."""
+    for field_name, message in getattr(request, 'upload_errors', {}).items():
+        if field_name in form.fields:
+            form.add_error(field_name, message)
+
+
+def content_hash(request, field_name):
+    return getattr(request, 'upload_hashes', {}).get(field_name, '')
+
+
+def file_sha256(fileobj):
+    sha256 = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(HASH_BLOCK), b''):
+        sha256.update(block)
+    return sha256.hexdigest()
+
+
+# Resumable chunked uploads
+
+def chunk_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'chunked_uploads'))
+
+
+def part_path(upload):
+    return os.path.join(chunk_dir(), f"{upload.pk}.part")
+
+
+def append_chunk(upload, stream, length):
+    """
+    Append ``length`` bytes of ``stream`` at upload.offset (the caller checks
+    it fits in upload.size). Returns an error message, with nothing written,
+    if the file does not start with an allowed type.
+    """
+    os.makedirs(chunk_dir(), exist_ok=True)
+    path = part_path(upload)
+    remaining = length
+    with open(path, 'ab') as part:
+        # Drop anything past the last acknowledged offset (an interrupted chunk)
+        part.truncate(upload.offset)
+        part.seek(upload.offset)
+        while remaining:
+            data = stream.read(min(HASH_BLOCK, remaining))
+            if not data:
+                break
+            if part.tell() == 0:
+                error = type_error(upload.field, data)
+                if error:
+                    return error
+            part.write(data)
+            remaining -= len(data)
+        upload.offset = part.tell()
+
+    if upload.offset == upload.size:
+        with open(path, 'rb') as part:
+            upload.sha256 = file_sha256(part)
+        upload.completed_at = timezone.now()
+    upload.save(update_fields=['offset', 'sha256', 'completed_at'])
+    return None
+
+
+def claim(user, field_name, upload_id):
+    """
+    The finished chunked upload ``upload_id`` as an UploadedFile for a form's
+    ``files``, plus its SHA-256; ``(None, '')`` if there is no such upload
+    (including a malformed id). Call discard() once the form has been saved;
+    an upload left behind by an invalid form is removed by purge_stale().
+    """
+    from .models import ChunkedUpload
+
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return None, ''
+    upload = ChunkedUpload.objects.filter(
+        pk=upload_id, user=user, field=field_name, completed_at__isnull=False
+    ).first()
+    if upload is None:
+        return None, ''
+    part = open(part_path(upload), 'rb')
+    content_type = sniff(part.read(16))
+    part.seek(0)
+    uploaded = UploadedFile(part, name=upload.filename, content_type=content_type, size=upload.size)
+    uploaded.chunked_upload = upload
+    return uploaded, upload.sha256
+
+
+def discard(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def purge_stale(hours):
+    """Delete chunked uploads (finished or not) older than ``hours``."""
+    from .models import ChunkedUpload
+
+    stale = ChunkedUpload.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours))
+    count = 0
+    for upload in stale.iterator():
+        discard(upload)
+        count += 1
+    return count
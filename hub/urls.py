@@ -1,19 +1,28 @@
 # hub/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Public read views: async versions when serving through ASGI
+if getattr(settings, "ASYNC_READ_VIEWS", False):
+    from . import async_views as read_views
+else:
+    read_views = views
 
 app_name = "hub"
 
 urlpatterns = [
     # Home / attachments
-    path("", views.home, name="home"),
-    path("attachments/", views.vacancy_list, name="vacancy_list"),
-    path("attachments/<int:pk>/", views.vacancy_detail, name="vacancy_detail"),
+    path("", read_views.home, name="home"),
+    path("attachments/", read_views.vacancy_list, name="vacancy_list"),
+    path("attachments/<int:pk>/", read_views.vacancy_detail, name="vacancy_detail"),
+    path("attachments/<int:pk>/apply/link/", views.vacancy_apply_link, name="vacancy_apply_link"),
 
     # Company register / verify / public profile
     path("companies/register/", views.company_register, name="company_register"),
     path("companies/verify/<uidb64>/<token>/", views.verify_company_email, name="verify_company_email"),
-    path("companies/<int:company_id>/", views.company_profile, name="company_profile"),
+    path("companies/<int:company_id>/", read_views.company_profile, name="company_profile"),
+    path("companies/<int:company_id>/follow/", views.company_follow, name="company_follow"),
 
     # ⭐ THIS is the missing route causing NoReverseMatch
     path(
@@ -24,6 +33,7 @@ urlpatterns = [
 
     # Company dashboards & attachment vacancies
     path("company/dashboard/", views.company_dashboard, name="company_dashboard"),
+    path("company/archive/", views.company_archive, name="company_archive"),
     path("company/vacancies/new/", views.vacancy_create, name="vacancy_create"),
     path("company/vacancies/<int:pk>/edit/", views.vacancy_edit, name="vacancy_edit"),
 
@@ -31,15 +41,20 @@ urlpatterns = [
     path("moderator/dashboard/", views.moderator_dashboard, name="moderator_dashboard"),
 
     # Jobs (standard + easy apply)
-    path("jobs/", views.job_list, name="job_list"),
-    path("jobs/<int:pk>/", views.job_detail, name="job_detail"),
+    path("jobs/", read_views.job_list, name="job_list"),
+    path("jobs/<int:pk>/", read_views.job_detail, name="job_detail"),
     path("jobs/<int:pk>/apply/easy/", views.job_easy_apply, name="job_easy_apply"),
     path("jobs/<int:pk>/apply/full/", views.job_apply_standard, name="job_apply_standard"),
 
     # Student flows
     path("student/register/", views.student_register, name="student_register"),
     path("student/profile/", views.student_profile, name="student_profile"),
+    path("student/profile/resume/", views.student_resume, name="student_resume"),
+    path("student/uploads/", views.chunked_upload_create, name="chunked_upload_create"),
+    path("student/uploads/<uuid:upload_id>/", views.chunked_upload_detail, name="chunked_upload_detail"),
     path("student/dashboard/", views.student_dashboard, name="student_dashboard"),
+    path("student/searches/save/", views.saved_search_create, name="saved_search_create"),
+    path("student/searches/<int:pk>/delete/", views.saved_search_delete, name="saved_search_delete"),
 
     # Company job posting + applicants
     path("company/jobs/new/", views.job_create, name="job_create"),
@@ -48,12 +63,28 @@ urlpatterns = [
         views.company_job_applicants,
         name="company_job_applicants",
     ),
+    path(
+        "company/jobs/<int:pk>/applicants/events/",
+        async_views.company_job_applicant_events,
+        name="company_job_applicant_events",
+    ),
     path(
         "company/applications/<int:app_id>/status/",
         views.update_application_status,
         name="update_application_status",
     ),
+    path(
+        "applications/<int:app_id>/resume/",
+        views.application_resume,
+        name="application_resume",
+    ),
 
     # Static page
     path("about/", views.about, name="about"),
+
+    # Crawlers: sitemaps and feeds of the live listings
+    path("sitemap.xml", views.sitemap_index, name="sitemap_index"),
+    path("sitemaps/<slug:section>-<int:page>.xml", views.sitemap_section, name="sitemap_section"),
+    path("feeds/listings.atom", views.listings_feed, {"fmt": "atom"}, name="listings_feed_atom"),
+    path("feeds/listings.rss", views.listings_feed, {"fmt": "rss"}, name="listings_feed_rss"),
 ]
@@ -1,3 +1,6 @@
+import os
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -9,12 +12,16 @@ from .forms import StudentRegistrationForm
 from django.contrib.auth import login as auth_login
 
 from .tokens import company_email_token, encode_uid, decode_uid
-from django.db.models import Q
+from . import applicant_summaries, dedup, engagement, feed, funnel, fuzzy, geo, live, saved_searches, sitemaps, snapshots, uploads
+from .protected_media import serve_protected
+from .principal import principal_for
+from django.db.models import Case, F, FloatField, Q, Value, When
 from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.core.mail import send_mail
-from django.db import transaction
-from django.http import Http404
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.utils.http import url_has_allowed_host_and_scheme
 
 from .forms import (
@@ -23,7 +30,9 @@ from .forms import (
 )
 from .models import (
     Vacancy, CompanyProfile, CompanyReview,
-    StudentProfile, JobPost, JobApplication
+    StudentProfile, JobPost, JobApplication, ListingFingerprint,
+    SavedSearch, ArchivedVacancy, ArchivedJobPost, ChunkedUpload, ApplicantSummary,
+    ArchivedApplication
 )
 from .forms import (
     ApplicationPersonalForm, EducationFormSet, CertificationFormSet,
@@ -35,6 +44,17 @@ from .forms import (
 
 User = get_user_model()
 
+# company_job_applicants ?sort=, on ApplicantSummary; applicants without one (Easy Apply) last
+APPLICANT_SORTS = {
+    'education': (
+        F('summary__education_level').desc(nulls_last=True),
+        F('summary__experience_months').desc(nulls_last=True),
+        '-created_at',
+    ),
+    'experience': (F('summary__experience_months').desc(nulls_last=True), '-created_at'),
+    'start_date': (F('summary__start_date').asc(nulls_last=True), '-created_at'),
+}
+
 
 def home(request):
     return vacancy_list(request)
@@ -45,6 +65,22 @@ def vacancy_list(request):
     Public listing of active, non-expired attachment vacancies
     with search & filters. Used by the home page as well.
     """
+    vacancies, context = vacancy_search(request)
+
+    # Pagination (12 cards per page)
+    paginator = Paginator(vacancies, 12)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+
+    context['vacancies'] = page_obj      # iterate over this in the template
+    context['page_obj'] = page_obj
+    return render(request, 'hub/vacancy_list.html', context)
+
+def vacancy_search(request):
+    """
+    Filtered vacancy queryset for the listing page, plus the filter values
+    to echo back into the template. Shared with the async views.
+    """
     today = timezone.now().date()
 
     q = request.GET.get('q', '').strip()
@@ -73,23 +109,45 @@ def vacancy_list(request):
     if verified == '1':
         vacancies = vacancies.filter(company__is_verified_company=True)
 
-    # Pagination (12 cards per page)
-    paginator = Paginator(vacancies, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
     context = {
-        'vacancies': page_obj,           # iterate over this in the template
-        'page_obj': page_obj,
         'q': q,
         'company_name': company_name,
         'verified': verified,
     }
-    return render(request, 'hub/vacancy_list.html', context)
+    vacancies = _geo_filter(request, vacancies, context)
+    return vacancies, context
+
+def _geo_filter(request, listings, context):
+    """
+    County (``county``) and "within ``km`` of ``near``" filters shared by the
+    vacancy and job searches. Nearby results come back closest first.
+    """
+    county = request.GET.get('county', '')
+    near = request.GET.get('near', '').strip()
+    km = geo.parse_radius(request.GET.get('km'))
+    context.update({
+        'county': county,
+        'near': near,
+        'km': int(km),
+        'counties': geo.counties(),
+        'radius_choices': (5, 10, 25, 50, 100, 200),
+        'near_place': None,
+    })
+    if county in context['counties']:
+        listings = listings.filter(county_code=county)
+    if near:
+        place = geo.lookup(near)
+        if place is None:
+            context['near_error'] = f'"{near}" is not a town or county we know.'
+        else:
+            context['near_place'] = place
+            listings = geo.within(listings, place, km).order_by('distance_km', '-created_at')
+    return listings
 
 def vacancy_detail(request, pk):
     vacancy = get_object_or_404(Vacancy, pk=pk, is_active=True)
     company = vacancy.company
+    engagement.record_view(request, vacancy)
 
     # Approved reviews for this company
     reviews = company.reviews.filter(approved=True)[:6]
@@ -108,6 +166,18 @@ def vacancy_detail(request, pk):
     }
     return render(request, 'hub/vacancy_detail.html', context)
 
+def vacancy_apply_link(request, pk):
+    # Counts the click (hub/engagement.py), then leaves for the company portal
+    row = (
+        Vacancy.objects.filter(pk=pk, is_active=True).exclude(application_link='')
+        .values_list('application_link', 'company_id').first()
+    )
+    if row is None:
+        raise Http404("No application link for this vacancy.")
+    link, company_id = row
+    engagement.record_click(request, pk, company_id)
+    return redirect(link)
+
 def _client_identifier(request):
     if request.user.is_authenticated:
         return f"user:{request.user.pk}"
@@ -142,7 +212,9 @@ def submit_company_review(request, company_id):
 def company_register(request):
     if request.method == 'POST':
         form = CompanyRegistrationForm(request.POST, request.FILES)
+        uploads.report_errors(request, form)
         if form.is_valid():
+            form.instance.logo_sha256 = uploads.content_hash(request, 'logo')
             company = form.save()
             _send_company_verification_email(request, company)
             messages.success(
@@ -197,14 +269,9 @@ def verify_company_email(request, uidb64, token):
 
 
 def is_verified_company_user(user):
-    if not user.is_authenticated:
-        return False
-    if not getattr(user, 'is_company', lambda: False)():
-        return False
-    try:
-        return user.company_profile.can_post
-    except CompanyProfile.DoesNotExist:
-        return False
+    # Served from the cached principal; no company_profile query
+    principal = principal_for(user)
+    return principal.is_company and principal.can_post
 
 
 @login_required
@@ -212,11 +279,51 @@ def is_verified_company_user(user):
 def company_dashboard(request):
     company = request.user.company_profile
     vacancies = company.vacancies.all()
-    jobs = company.job_posts.all()
+    jobs = list(company.job_posts.all())
+    # Funnel figures come from the daily rollups, not from the applications
+    funnel_data = funnel.company_funnel(jobs)
+    for job in jobs:
+        job.funnel = funnel_data['by_job'].get(job.pk)
     return render(request, "hub/company_dashboard.html", {
         "company": company,
         "vacancies": vacancies,
         "jobs": jobs,
+        "funnel": funnel_data,
+    })
+
+def _check_near_duplicates(form, company):
+    """
+    Reject a new listing that clones one of the company's live listings.
+    Returns the near-duplicate matches (possibly empty) when posting may go
+    ahead, or None after adding a form error.
+    """
+    matches = dedup.find_near_duplicates(company, dedup.listing_text(form.instance))
+    live = dedup.active_duplicate(matches)
+    if live:
+        fp, score = live
+        form.add_error(
+            None,
+            f"This looks like a repost of your live listing \"{fp.title}\" "
+            f"({score:.0%} similar). Edit that listing instead of posting a copy."
+        )
+        return None
+    return matches
+
+@login_required
+@user_passes_test(is_verified_company_user)
+def company_archive(request):
+    """Archived vacancies and job posts; read from the cold tables, paginated."""
+    company = request.user.company_profile
+    tab = request.GET.get('tab', 'attachments')
+    if tab == 'jobs':
+        rows = ArchivedJobPost.objects.filter(company=company).defer('applications')
+    else:
+        rows = ArchivedVacancy.objects.filter(company=company)
+    page_obj = Paginator(rows, 20).get_page(request.GET.get('page'))
+    return render(request, 'hub/company_archive.html', {
+        'company': company,
+        'tab': tab,
+        'page_obj': page_obj,
     })
 
 @login_required
@@ -228,9 +335,12 @@ def vacancy_create(request):
         # IMPORTANT: attach company before is_valid(), so model.clean() can use it
         form.instance.company = company
         if form.is_valid():
-            vacancy = form.save()
-            messages.success(request, "Vacancy posted successfully.")
-            return redirect('hub:company_dashboard')
+            matches = _check_near_duplicates(form, company)
+            if matches is not None:
+                vacancy = form.save()
+                dedup.index_listing(vacancy, matches)
+                messages.success(request, "Vacancy posted successfully.")
+                return redirect('hub:company_dashboard')
     else:
         form = VacancyForm()
     return render(request, 'hub/vacancy_form.html', {'form': form})
@@ -243,13 +353,54 @@ def vacancy_edit(request, pk):
     if request.method == 'POST':
         form = VacancyForm(request.POST, instance=vacancy)
         if form.is_valid():
-            form.save()
+            vacancy = form.save()
+            matches = dedup.find_near_duplicates(
+                company, dedup.listing_text(vacancy), exclude=('VACANCY', vacancy.pk)
+            )
+            dedup.index_listing(vacancy, matches)
             messages.success(request, "Vacancy updated.")
             return redirect('hub:company_dashboard')
     else:
         form = VacancyForm(instance=vacancy)
     return render(request, 'hub/vacancy_form.html', {'form': form, 'edit_mode': True})
 
+def _cached_document(request, name, content_type, render_chunks):
+    # Cached copy, or stream the chunks while generating and keep the result
+    key = sitemaps.cache_key(request.build_absolute_uri('/')[:-1], name)
+    body = cache.get(key)
+    if body is not None:
+        return HttpResponse(body, content_type=content_type)
+
+    def stream():
+        chunks = []
+        for chunk in render_chunks():
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, ''.join(chunks), sitemaps._timeout())
+    return StreamingHttpResponse(stream(), content_type=content_type)
+
+def sitemap_index(request):
+    base_url = request.build_absolute_uri('/')[:-1]
+    return _cached_document(request, 'index', 'application/xml', lambda: sitemaps.render_index(base_url))
+
+def sitemap_section(request, section, page):
+    if section not in sitemaps.SECTIONS or page < 1:
+        raise Http404("No such sitemap.")
+    base_url = request.build_absolute_uri('/')[:-1]
+    return _cached_document(
+        request, f'{section}-{page}', 'application/xml',
+        lambda: sitemaps.render_section(base_url, section, page),
+    )
+
+def listings_feed(request, fmt):
+    key = sitemaps.cache_key(request.build_absolute_uri('/')[:-1], f'feed-{fmt}')
+    cached = cache.get(key)
+    if cached is None:
+        cached = sitemaps.render_feed(request.build_absolute_uri('/')[:-1], fmt)
+        cache.set(key, cached, sitemaps._timeout())
+    body, content_type = cached
+    return HttpResponse(body, content_type=content_type)
+
 def about(request):
     return render(request, 'hub/about.html')
 
@@ -260,10 +411,7 @@ def is_student(user):
     return user.is_authenticated and user.role == 'STUDENT'
 
 def is_company_approved(user):
-    try:
-        return user.is_authenticated and user.is_company() and user.company_profile.can_post
-    except CompanyProfile.DoesNotExist:
-        return False
+    return is_verified_company_user(user)
 
 @login_required
 @user_passes_test(is_moderator)
@@ -298,14 +446,49 @@ def moderator_dashboard(request):
                         obj.is_active = False
                         obj.save()
                         messages.success(request, "Job deactivated.")
+            elif obj_type == 'duplicate':
+                obj = ListingFingerprint.objects.filter(id=obj_id).first()
+                if obj and action == 'dismiss':
+                    obj.duplicate_of = None
+                    obj.similarity = None
+                    obj.save(update_fields=['duplicate_of', 'similarity'])
+                    messages.success(request, "Duplicate flag dismissed.")
+
+    # Reposts grouped under the listing they copy
+    flagged = (
+        ListingFingerprint.objects.filter(duplicate_of__isnull=False)
+        .select_related('duplicate_of__company')
+        .order_by('duplicate_of_id', '-similarity')[:100]
+    )
+    duplicate_clusters = {}
+    for fp in flagged:
+        duplicate_clusters.setdefault(fp.duplicate_of, []).append(fp)
+
     return render(request, 'hub/moderator_dashboard.html', {
         'unapproved_companies': unapproved_companies,
         'pending_reviews': pending_reviews,
         'pending_jobs': pending_jobs,
+        'duplicate_clusters': duplicate_clusters.items(),
     })
 
 def job_list(request):
     # Toggle: jobs vs attachments by query param `mode=jobs|attachments`
+    if request.GET.get('mode', 'jobs') == 'attachments':
+        return vacancy_list(request)  # reuse your existing function
+
+    jobs, context = job_search(request, fuzzy_fallback=True)
+    context['jobs'] = jobs
+    return render(request, 'hub/job_list.html', context)
+
+def job_search(request, fuzzy_fallback=False):
+    """
+    Filtered job queryset plus filter values, shared with the async views.
+
+    With ``fuzzy_fallback``, a text query that matches fewer than
+    fuzzy.FALLBACK_BELOW jobs exactly also brings in close trigram matches,
+    ranked after the exact ones. That costs a count and an index lookup, so
+    async callers run it in a thread.
+    """
     mode = request.GET.get('mode', 'jobs')
     q = request.GET.get('q', '')
     company_name = request.GET.get('company', '')
@@ -317,13 +500,7 @@ def job_list(request):
 
     context = {'mode': mode, 'q': q, 'company_name': company_name, 'exp': exp, 'type': jtype, 'remote': remote, 'smin': salary_min, 'smax': salary_max}
 
-    if mode == 'attachments':
-        return vacancy_list(request)  # reuse your existing function
-
-    # Jobs mode
-    jobs = JobPost.objects.filter(is_active=True)
-    if q:
-        jobs = jobs.filter(Q(title__icontains=q) | Q(department__icontains=q))
+    jobs = JobPost.objects.select_related('company').filter(is_active=True)
     if company_name:
         jobs = jobs.filter(company__name__icontains=company_name)
     if exp:
@@ -337,12 +514,30 @@ def job_list(request):
     if salary_max:
         jobs = jobs.filter(Q(salary_max__lte=salary_max) | Q(salary_max__isnull=True))
 
-    context['jobs'] = jobs
-    return render(request, 'hub/job_list.html', context)
+    jobs = _geo_filter(request, jobs, context)
+    if q:
+        exact = Q(title__icontains=q) | Q(department__icontains=q)
+        matches = {}
+        if fuzzy_fallback and jobs.filter(exact).count() < fuzzy.FALLBACK_BELOW:
+            matches = fuzzy.job_matches(q)
+        if matches:
+            context['fuzzy'] = True
+            jobs = jobs.filter(exact | Q(pk__in=matches)).annotate(
+                match_score=Case(
+                    When(exact, then=Value(2.0)),
+                    *[When(pk=pk, then=Value(score)) for pk, score in matches.items()],
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            ).order_by('-match_score', '-created_at')
+        else:
+            jobs = jobs.filter(exact)
+    return jobs, context
 
 def job_detail(request, pk):
     job = get_object_or_404(JobPost, pk=pk, is_active=True)
     company = job.company
+    engagement.record_view(request, job)
     avg_rating = CompanyReview.average_for_company(company)
     return render(request, 'hub/job_detail.html', {
         'job': job, 'company': company, 'avg_rating': avg_rating
@@ -360,14 +555,10 @@ def job_easy_apply(request, pk):
     if request.method == 'POST':
         form = JobEasyApplyForm(request.POST)
         if form.is_valid():
-            # prevent duplicate
-            if JobApplication.objects.filter(job=job, student=student).exists():
-                messages.info(request, "You have already applied to this job.")
-                return redirect('hub:job_detail', pk=pk)
-
             app = form.save(commit=False)
             app.job = job
             app.student = student
+            app.idempotency_key = form.cleaned_data['idempotency_key']
 
             # use saved cover letter
             if form.cleaned_data.get('use_profile_cover') and profile and profile.default_cover_letter:
@@ -377,7 +568,20 @@ def job_easy_apply(request, pk):
             if profile and profile.resume and not app.resume_snapshot:
                 app.resume_snapshot = profile.resume
 
-            app.save()
+            # Insert, or find the unique (job, student) row already there: no
+            # exists() pre-check for a double click to race past
+            try:
+                with transaction.atomic():
+                    app.save()
+            except IntegrityError:
+                original = (
+                    JobApplication.objects.filter(job=job, student=student)
+                    .values_list('idempotency_key', flat=True).first()
+                )
+                if app.idempotency_key is None or original != app.idempotency_key:
+                    messages.info(request, "You have already applied to this job.")
+                    return redirect('hub:job_detail', pk=pk)
+                # A retry of the submission that created it: same outcome again
             messages.success(request, "Application submitted.")
             return redirect('hub:student_dashboard')
     else:
@@ -390,20 +594,146 @@ def job_easy_apply(request, pk):
 def student_profile(request):
     profile, _ = StudentProfile.objects.get_or_create(user=request.user)
     if request.method == 'POST':
-        form = StudentProfileForm(request.POST, request.FILES, instance=profile)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Profile updated.")
-            return redirect('hub:student_profile')
+        files, resume_hash = request.FILES, uploads.content_hash(request, 'resume')
+        chunked = None
+        if request.POST.get('resume_upload') and 'resume' not in files:
+            chunked, resume_hash = uploads.claim(request.user, 'resume', request.POST['resume_upload'])
+            if chunked is not None:
+                files = files.copy()
+                files['resume'] = chunked
+        form = StudentProfileForm(request.POST, files, instance=profile)
+        uploads.report_errors(request, form)
+        try:
+            if form.is_valid():
+                if 'resume' in files:
+                    form.instance.resume_sha256 = resume_hash
+                elif form.cleaned_data.get('resume') is False:
+                    form.instance.resume_sha256 = ''
+                form.save()
+                if chunked is not None:
+                    uploads.discard(chunked.chunked_upload)
+                messages.success(request, "Profile updated.")
+                return redirect('hub:student_profile')
+        finally:
+            # Kept after an invalid form so it can be resubmitted; purge_chunked_uploads clears it later
+            if chunked is not None:
+                chunked.close()
     else:
         form = StudentProfileForm(instance=profile)
-    return render(request, 'hub/student_profile.html', {'form': form})
+    return render(request, 'hub/student_profile.html', {
+        'form': form,
+        'chunk_bytes': uploads.CHUNK_MAX_BYTES,
+    })
+
+@login_required
+@user_passes_test(is_student)
+def chunked_upload_create(request):
+    """Start a resumable CV upload: POST field, filename, size."""
+    if request.method != 'POST':
+        return JsonResponse({'error': "POST required."}, status=405)
+    field = request.POST.get('field', '')
+    if field != 'resume':
+        return JsonResponse({'error': "Unsupported field."}, status=400)
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'error': "Missing file size."}, status=400)
+    if size <= 0 or size > uploads.max_bytes()[field]:
+        return JsonResponse({'error': uploads.size_error(field)}, status=413)
+    upload = ChunkedUpload.objects.create(
+        user=request.user,
+        field=field,
+        filename=os.path.basename(request.POST.get('filename', ''))[:255] or 'resume',
+        size=size,
+    )
+    return JsonResponse(_chunked_upload_state(upload), status=201)
+
+@login_required
+@user_passes_test(is_student)
+def chunked_upload_detail(request, upload_id):
+    """
+    GET: the current offset, to resume after a dropped connection.
+    PUT: append the body at the ``Upload-Offset`` header (409 with the
+    current offset if the client is out of step).
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_chunked_upload_state(upload))
+    if request.method != 'PUT':
+        return JsonResponse({'error': "GET or PUT required."}, status=405)
+    if upload.is_complete:
+        return JsonResponse(_chunked_upload_state(upload))
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'error': "Missing Upload-Offset."}, status=400)
+    if offset != upload.offset:
+        return JsonResponse(_chunked_upload_state(upload), status=409)
+    if length > uploads.CHUNK_MAX_BYTES or offset + length > upload.size:
+        return JsonResponse({'error': "Chunk too large."}, status=413)
+
+    error = uploads.append_chunk(upload, request, length)
+    if error:
+        uploads.discard(upload)
+        return JsonResponse({'error': error}, status=415)
+    return JsonResponse(_chunked_upload_state(upload))
+
+def _chunked_upload_state(upload):
+    return {
+        'id': str(upload.pk),
+        'offset': upload.offset,
+        'size': upload.size,
+        'complete': upload.is_complete,
+        'url': reverse('hub:chunked_upload_detail', args=[upload.pk]),
+    }
 
 @login_required
 @user_passes_test(is_student)
 def student_dashboard(request):
     apps = JobApplication.objects.filter(student=request.user).select_related('job','job__company')
-    return render(request, 'hub/student_dashboard.html', {'applications': apps})
+    # Applications to job posts that have since been archived (hub/archive.py)
+    archived_apps = (
+        ArchivedApplication.objects.filter(student=request.user)
+        .select_related('job', 'job__company').defer('job__applications')
+    )
+    searches = SavedSearch.objects.filter(student=request.user)
+    # Cached timeline head; ?before= pages further back (see hub/feed.py)
+    entries, older = feed.page(request.user.pk, request.GET.get('before'))
+    return render(request, 'hub/student_dashboard.html', {
+        'applications': apps,
+        'archived_applications': archived_apps,
+        'saved_searches': searches,
+        'feed_entries': entries,
+        'feed_older': older,
+        'following_count': len(feed.head(request.user.pk)['companies']),
+    })
+
+@login_required
+@user_passes_test(is_student)
+def saved_search_create(request):
+    if request.method == 'POST':
+        kind = 'JOB' if request.POST.get('kind') == 'JOB' else 'VACANCY'
+        params = saved_searches.clean_params(kind, request.POST)
+        search, created = SavedSearch.objects.get_or_create(
+            student=request.user, kind=kind, params=params
+        )
+        if created:
+            messages.success(request, "Search saved. We'll email you when new listings match.")
+        else:
+            messages.info(request, "You have already saved this search.")
+        return redirect(search.get_absolute_url())
+    return redirect('hub:student_dashboard')
+
+@login_required
+@user_passes_test(is_student)
+def saved_search_delete(request, pk):
+    search = get_object_or_404(SavedSearch, pk=pk, student=request.user)
+    if request.method == 'POST':
+        search.delete()
+        messages.success(request, "Saved search removed.")
+    return redirect('hub:student_dashboard')
 
 @login_required
 @user_passes_test(is_company_approved)
@@ -411,12 +741,14 @@ def job_create(request):
     company = request.user.company_profile
     if request.method == 'POST':
         form = JobPostForm(request.POST)
+        form.instance.company = company
         if form.is_valid():
-            job = form.save(commit=False)
-            job.company = company
-            job.save()
-            messages.success(request, "Job posted successfully.")
-            return redirect('hub:company_job_applicants', pk=job.pk)
+            matches = _check_near_duplicates(form, company)
+            if matches is not None:
+                job = form.save()
+                dedup.index_listing(job, matches)
+                messages.success(request, "Job posted successfully.")
+                return redirect('hub:company_job_applicants', pk=job.pk)
     else:
         form = JobPostForm()
     return render(request, 'hub/job_form.html', {'form': form})
@@ -425,18 +757,18 @@ def job_create(request):
 @user_passes_test(is_company_approved)
 def company_job_applicants(request, pk):
     job = get_object_or_404(
-        JobPost,
+        JobPost.objects.select_related('company'),
         pk=pk,
-        company=request.user.company_profile
+        company_id=request.principal.company_id
     )
 
     status = request.GET.get('status', '')
     q = request.GET.get('q', '')
 
-    # Pull applications + student + student_profile in one go
+    # Pull applications + student + student_profile + summary in one go
     apps = (
         job.applications
-        .select_related('student', 'student__student_profile')
+        .select_related('student', 'student__student_profile', 'summary')
         .all()
     )
 
@@ -449,22 +781,68 @@ def company_job_applicants(request, pk):
             Q(cover_letter__icontains=q)
         )
 
+    # Standard Apply answers, from the precomputed ApplicantSummary
+    filters = {
+        key: request.GET.get(key, '')
+        for key in ('education', 'graduated', 'eligible', 'min_years', 'start_by', 'sort')
+    }
+    summary = {}
+    if filters['education'].isdigit():
+        summary['summary__education_level__gte'] = int(filters['education'])
+    if filters['graduated']:
+        summary['summary__graduated'] = True
+    if filters['eligible'] in ('yes', 'no'):
+        summary['summary__eligible_to_work'] = filters['eligible'] == 'yes'
+    if filters['min_years'].isdigit():
+        summary['summary__experience_months__gte'] = int(filters['min_years']) * 12
+    try:
+        start_by = parse_date(filters['start_by']) if filters['start_by'] else None
+    except ValueError:
+        # Well-formed but impossible, e.g. 2024-13-45
+        start_by = None
+    if start_by:
+        summary['summary__start_date__lte'] = start_by
+    if summary:
+        # On the summary's own job column, so its (job, ...) indexes apply
+        apps = apps.filter(summary__job=job, **summary)
+    ordering = APPLICANT_SORTS.get(filters['sort'])
+    if ordering:
+        apps = apps.order_by(*ordering)
+
+    # Live updates need the long-lived stream that only ASGI serves cheaply
+    live_events_url = None
+    if getattr(settings, 'ASYNC_READ_VIEWS', False):
+        live_events_url = (
+            reverse('hub:company_job_applicant_events', args=[job.pk]) + '?after=' + live.position(job.pk)
+        )
+
     return render(request, 'hub/company_job_applicants.html', {
         'job': job,
         'applications': apps,
         'status': status,
         'q': q,
         'status_choices': JobApplication.STATUS_CHOICES,   # 👈 NEW
+        'filters': filters,
+        'education_levels': ApplicantSummary.EDUCATION_LEVELS,
+        # New applications cannot be placed among filtered or sorted cards
+        'refined': bool(summary or ordering),
+        'live_events_url': live_events_url,
     })
 
 @login_required
 @user_passes_test(is_company_approved)
 def update_application_status(request, app_id):
-    app = get_object_or_404(JobApplication, id=app_id, job__company=request.user.company_profile)
+    app = get_object_or_404(
+        JobApplication.objects.select_related('job', 'student'),
+        id=app_id, job__company_id=request.principal.company_id
+    )
     new_status = request.POST.get('status')
     if new_status in dict(JobApplication.STATUS_CHOICES):
-        app.status = new_status
-        app.save()
+        old_status = app.status
+        with transaction.atomic():
+            app.status = new_status
+            app.save()
+            funnel.status_changed(app, old_status)
         # Optional: email response
         try:
             send_mail(
@@ -479,29 +857,56 @@ def update_application_status(request, app_id):
         messages.success(request, "Status updated and notification sent.")
     return redirect('hub:company_job_applicants', pk=app.job.pk)
 
-def company_profile(request, company_id):
-    company = get_object_or_404(CompanyProfile, id=company_id)
-    tab = request.GET.get('tab', 'attachments')  # 'attachments' | 'jobs'
-
-    # Attachments: active vacancies
-  
-    today = timezone.now().date()
-    attachments = company.vacancies.filter(is_active=True, deadline__gte=today)
+@login_required
+def application_resume(request, app_id):
+    """
+    The CV sent with an application, for the applicant or the (approved)
+    company that received it; anyone else gets a 404.
+    """
+    principal = request.principal
+    allowed = Q(student_id=principal.user_id)
+    if principal.is_company and principal.can_post:
+        allowed |= Q(job__company_id=principal.company_id)
+    app = get_object_or_404(
+        JobApplication.objects.filter(allowed).select_related('student__student_profile'),
+        pk=app_id,
+    )
+    resume = app.resume_snapshot
+    if not resume:
+        profile = getattr(app.student, 'student_profile', None)
+        resume = profile.resume if profile else None
+    if not resume:
+        raise Http404("No CV uploaded.")
+    return serve_protected(request, resume)
 
-    # Jobs: active job posts
-    jobs = company.job_posts.filter(is_active=True)
+@login_required
+@user_passes_test(is_student)
+def student_resume(request):
+    """The logged-in student's own profile CV."""
+    profile = get_object_or_404(StudentProfile, user=request.user)
+    if not profile.resume:
+        raise Http404("No CV uploaded.")
+    return serve_protected(request, profile.resume)
 
-    avg_rating = CompanyReview.average_for_company(company)
-    reviews = company.reviews.filter(approved=True)[:6]
+def company_profile(request, company_id):
+    # Rendered from the materialized snapshot: one lookup (see hub/snapshots.py)
+    tab = request.GET.get('tab', 'attachments')  # 'attachments' | 'jobs'
+    context = snapshots.profile_context(company_id, tab)
+    context['following'] = feed.is_following(getattr(request, 'user', None), company_id)
+    return render(request, 'hub/company_profile.html', context)
 
-    return render(request, 'hub/company_profile.html', {
-        'company': company,
-        'tab': tab,
-        'attachments': attachments,
-        'jobs': jobs,
-        'avg_rating': avg_rating,
-        'reviews': reviews,
-    })
+@login_required
+@user_passes_test(is_student)
+def company_follow(request, company_id):
+    company = get_object_or_404(CompanyProfile, pk=company_id)
+    if request.method == 'POST':
+        if request.POST.get('action') == 'unfollow':
+            feed.unfollow(request.user.pk, company.pk)
+            messages.info(request, f"You no longer follow {company.name}.")
+        else:
+            feed.follow(request.user.pk, company.pk)
+            messages.success(request, f"Following {company.name}. Their new listings will appear on your dashboard.")
+    return redirect('hub:company_profile', company_id=company.pk)
 
 # --- make student_register honor ?next= so it returns to the apply page ---
 def student_register(request):
@@ -529,11 +934,15 @@ def student_register(request):
 def company_dashboard(request):
     company = request.user.company_profile
     vacancies = company.vacancies.all()
-    jobs = company.job_posts.all()  # <-- add this
+    jobs = list(company.job_posts.all())  # <-- add this
+    funnel_data = funnel.company_funnel(jobs)
+    for job in jobs:
+        job.funnel = funnel_data['by_job'].get(job.pk)
     return render(request, "hub/company_dashboard.html", {
         "company": company,
         "vacancies": vacancies,
         "jobs": jobs,  # <-- and pass it
+        "funnel": funnel_data,
     })
 
 @login_required
@@ -546,7 +955,9 @@ def job_apply_standard(request, pk):
     student = request.user
 
     # create shell application if missing (so formsets have a parent)
-    application, _ = JobApplication.objects.get_or_create(job=job, student=student)
+    application, _ = JobApplication.objects.get_or_create(
+        job=job, student=student, defaults={'submitted_at': None}
+    )
 
     if request.method == "POST":
         personal_form = ApplicationPersonalForm(request.POST, instance=getattr(application, 'personal', None))
@@ -572,7 +983,13 @@ def job_apply_standard(request, pk):
             ch = crim_form.save(commit=False); ch.application = application; ch.save()
             rs = refsrc_form.save(commit=False); rs.application = application; rs.save()
             eeo = eeo_form.save(commit=False); eeo.application = application; eeo.save()
+            first_submission = application.submitted_at is None
+            if first_submission:
+                application.submitted_at = timezone.now()
             decl_form.save()
+            if first_submission:
+                funnel.application_created(application)
+            applicant_summaries.refresh(application)
             messages.success(request, "Your application has been submitted.")
             return redirect('hub:student_dashboard')
     else:
@@ -0,0 +1,131 @@
+"""
+Worker warm-up.
+
+The first requests on a fresh worker otherwise pay for importing the views,
+populating the URL resolvers, compiling every template they touch and
+filling per-process caches. run_on_boot(), called from
+attachment_hub/wsgi.py and asgi.py when WARMUP_ON_BOOT is set, does that work
+before the worker takes traffic:
+
+* compiles every template under hub/templates (the Django engine wraps its
+  loaders in the cached loader, so each is compiled once per process);
+* reverses and resolves every ``hub:`` URL name;
+* loads the gazetteer, fills the dashboard/metrics count cache and runs the
+  first page of the public listing queries.
+
+``python manage.py profile_startup`` measures what this saves.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_ROOT = os.path.join(os.path.dirname(__file__), 'templates')
+
+_SAMPLE_VALUES = {
+    'IntConverter': 1,
+    'UUIDConverter': uuid.UUID(int=0),
+}
+
+
+def template_names():
+    names = []
+    for root, _, files in os.walk(TEMPLATE_ROOT):
+        for filename in files:
+            if filename.endswith('.html'):
+                names.append(os.path.relpath(os.path.join(root, filename), TEMPLATE_ROOT).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def compile_templates():
+    from django.template.loader import get_template
+
+    names = template_names()
+    for name in names:
+        get_template(name)
+    return f"{len(names)} templates"
+
+
+def resolve_urls():
+    from django.urls import resolve, reverse
+
+    from . import urls
+
+    count = 0
+    for pattern in urls.urlpatterns:
+        converters = getattr(pattern.pattern, 'converters', {})
+        kwargs = {
+            name: _SAMPLE_VALUES.get(type(converter).__name__, 'x')
+            for name, converter in converters.items()
+        }
+        resolve(reverse(f'hub:{pattern.name}', kwargs=kwargs))
+        count += 1
+    return f"{count} hub URLs"
+
+
+def prime_caches():
+    from django.http import HttpRequest
+
+    from . import geo, metrics
+    from .views import job_search, vacancy_search
+
+    geo.counties()
+    metrics.domain_gauges()
+    request = HttpRequest()  # no filters: the home page and /jobs/ as first seen
+    vacancies, _ = vacancy_search(request)
+    jobs, _ = job_search(request)
+    found = vacancies.count() + jobs.count()
+    list(vacancies[:12])
+    list(jobs[:12])
+    return f"gazetteer, counts, listings ({found} live)"
+
+
+STEPS = (
+    ('templates', compile_templates),
+    ('urls', resolve_urls),
+    ('caches', prime_caches),
+)
+
+
+def warm_up():
+    """Run every step; returns ``[(step, seconds, detail or error)]``. A failing step is logged and skipped."""
+    results = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            detail = step()
+        except Exception as exc:
+            logger.exception("Warm-up step %s failed", name)
+            detail = f"failed: {exc}"
+        results.append((name, time.perf_counter() - started, detail))
+    return results
+
+
+def run_on_boot():
+    """
+    warm_up() in a short-lived thread, waited for. ASGI servers may import
+    the application inside a running event loop, where the ORM refuses
+    synchronous queries.
+    """
+    if not getattr(settings, 'WARMUP_ON_BOOT', False):
+        return
+
+    def target():
+        from django.db import connections
+
+        started = time.perf_counter()
+        results = warm_up()
+        connections.close_all()
+        logger.info(
+            "Worker %s warmed up in %.0f ms (%s)", os.getpid(), (time.perf_counter() - started) * 1000,
+            ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds, _ in results),
+        )
+
+    thread = threading.Thread(target=target, name='warm-up')
+    thread.start()
+    thread.join()